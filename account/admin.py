@@ -6,4 +6,5 @@ admin.site.register(UserAccount)
 admin.site.register(Customer)
 admin.site.register(Trainer)
 admin.site.register(TrainerProfile)
-admin.site.register(Booking)
\ No newline at end of file
+admin.site.register(Booking)
+admin.site.register(WorkingHours)
\ No newline at end of file
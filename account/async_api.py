@@ -0,0 +1,61 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def json_response(data, status=200, headers=None):
+    """A JSON response encoded the way DRF's JSONRenderer would."""
+    return JsonResponse(data, status=status, headers=headers, encoder=JSONEncoder, safe=False)
+
+
+def check_permission(request, permission):
+    # mirrors APIView.check_permissions / permission_denied
+    if permission.has_permission(request, None):
+        return
+    if request.authenticators and not request.successful_authenticator:
+        raise exceptions.NotAuthenticated()
+    raise exceptions.PermissionDenied(getattr(permission, 'message', None))
+
+
+def exception_response(request, exc):
+    # mirrors APIView.handle_exception for the exceptions these views can raise
+    headers = {}
+    status = exc.status_code
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        header = request.authenticators[0].authenticate_header(request) if request.authenticators else None
+        if header:
+            headers['WWW-Authenticate'] = header
+        else:
+            status = 403
+    detail = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    return json_response(detail, status=status, headers=headers)
+
+
+def async_api_view(permission_class):
+    """
+    Turn an async function view into an authenticated API endpoint.
+
+    DRF has no async views, so this does the part of api_view these endpoints
+    need: wrap the request in a DRF Request using the configured
+    authentication classes, check permission_class, and turn APIExceptions
+    into JSON errors. Authentication and the permission check run in one
+    sync_to_async hop; the view then gets the DRF Request (with
+    request.customer / request.trainer set by the role permissions) and must
+    return a plain Django response, usually json_response().
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+            try:
+                await sync_to_async(check_permission)(request, permission_class())
+                return await view(request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return exception_response(request, exc)
+        return wrapper
+    return decorator
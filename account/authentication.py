@@ -0,0 +1,150 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from .shared_store import shared_store
+
+
+class TokenCache:
+    """
+    Thread-safe LRU of token key -> (user, token) with a per-entry TTL.
+
+    Entries are evicted by signals when a token is deleted or its user saved.
+    The cache is per process, so evictions are also logged in the shared
+    store, and every lookup first applies the ones other workers logged
+    since the last. A worker that saw no lookups for a whole TTL has nothing
+    unexpired left to check and just starts over.
+    """
+
+    def __init__(self, maxsize, ttl, store=shared_store):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.store = store
+        self._entries = OrderedDict()
+        self._keys_by_user = {}
+        self._lock = threading.Lock()
+        self._seen = 0
+        self._synced = time.monotonic()
+
+    def sync(self):
+        """Drop entries revoked by any worker since the last sync."""
+        revoked = self.store.revocations(self._seen)
+        with self._lock:
+            if time.monotonic() - self._synced > self.ttl:
+                self._entries.clear()
+                self._keys_by_user.clear()
+            else:
+                for entry_id, token, user_id in revoked:
+                    if token is not None:
+                        self._remove(token)
+                    else:
+                        self._remove_user(user_id)
+            if revoked:
+                self._seen = max(self._seen, revoked[-1][0])
+            self._synced = time.monotonic()
+
+    def get(self, key):
+        self.sync()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, user, token = entry
+            if expires < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+        # hand out copies so one request can't leak changes into another
+        return self._copy(user, token)
+
+    def set(self, key, user, token):
+        # catch up first, so revocations older than this entry aren't applied to it later
+        self.sync()
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, *self._copy(user, token))
+            self._keys_by_user.setdefault(user.pk, set()).add(key)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def evict(self, key):
+        with self._lock:
+            self._remove(key)
+        self.store.revoke(token=key, keep=self.ttl)
+
+    def evict_user(self, user_id):
+        with self._lock:
+            self._remove_user(user_id)
+        self.store.revoke(user_id=user_id, keep=self.ttl)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_user.clear()
+
+    @staticmethod
+    def _copy(user, token):
+        """
+        Copies of user and token, down to the profiles select_related() cached
+        on the user, each pointing back at the copied user.
+        """
+        user = copy.copy(user)
+        for name, profile in list(user._state.fields_cache.items()):
+            if profile is not None:
+                profile = copy.copy(profile)
+                profile._state.fields_cache[user._meta.get_field(name).field.name] = user
+                user._state.fields_cache[name] = profile
+        token = copy.copy(token)
+        token.user = user
+        return user, token
+
+    def _remove_user(self, user_id):
+        for key in list(self._keys_by_user.get(user_id, ())):
+            self._remove(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._keys_by_user.get(entry[1].pk)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_user[entry[1].pk]
+
+
+token_cache = TokenCache(settings.AUTH_TOKEN_CACHE_SIZE, settings.AUTH_TOKEN_CACHE_TTL)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication that skips the token/user query for recently seen tokens.
+
+    On a miss the user's customer and trainer profiles are joined into the
+    same query, so the role permissions in account.permissions cost nothing.
+    """
+
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is not None:
+            return cached
+
+        model = self.get_model()
+        try:
+            token = model.objects.select_related(
+                'user', 'user__customer_profile', 'user__staff_profile'
+            ).get(key=key)
+        except model.DoesNotExist:
+            raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        if not token.user.is_active:
+            raise exceptions.AuthenticationFailed(_('User inactive or deleted.'))
+
+        token_cache.set(key, token.user, token)
+        return token.user, token
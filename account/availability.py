@@ -0,0 +1,91 @@
+import datetime
+from bisect import bisect_right
+from collections import defaultdict
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Booking, WorkingHours
+
+
+def session_duration():
+    return datetime.timedelta(minutes=settings.SESSION_DURATION_MINUTES)
+
+
+def default_working_hours():
+    """The schedule used for available trainers who haven't set their own hours."""
+    hours = []
+    for weekday, _ in WorkingHours.WEEKDAY_CHOICES:
+        for start, end in settings.TRAINER_DEFAULT_WORKING_HOURS:
+            hours.append(WorkingHours(
+                weekday=weekday,
+                start_time=datetime.time.fromisoformat(start),
+                end_time=datetime.time.fromisoformat(end),
+                slot_minutes=settings.SESSION_DURATION_MINUTES,
+            ))
+    return hours
+
+
+def open_slots(trainers, start_date, end_date, not_before=None):
+    """
+    Compute open slots for many trainers at once.
+
+    Returns {trainer_id: [aware slot start datetimes]} covering start_date to
+    end_date inclusive, in the current time zone. Working hours and bookings
+    for every trainer are fetched in one query each; a slot is open when no
+    booking overlaps it. Slots starting before not_before are dropped.
+    """
+    trainers = list(trainers)
+    ids = [trainer.id for trainer in trainers]
+    tz = timezone.get_current_timezone()
+    duration = session_duration()
+
+    hours = defaultdict(list)
+    for entry in WorkingHours.objects.filter(trainer_id__in=ids):
+        hours[entry.trainer_id].append(entry)
+
+    window_start = timezone.make_aware(datetime.datetime.combine(start_date, datetime.time.min), tz)
+    window_end = timezone.make_aware(datetime.datetime.combine(end_date + datetime.timedelta(days=1), datetime.time.min), tz)
+    booked = defaultdict(list)
+    bookings = Booking.objects.filter(
+        trainer_id__in=ids, start_time__gt=window_start - duration, start_time__lt=window_end
+    ).order_by('start_time').values_list('trainer_id', 'start_time')
+    for trainer_id, start in bookings:
+        booked[trainer_id].append(start)
+
+    defaults = default_working_hours()
+    days = [start_date + datetime.timedelta(days=n) for n in range((end_date - start_date).days + 1)]
+    result = {}
+    for trainer in trainers:
+        if trainer.available == 'no':
+            result[trainer.id] = []
+            continue
+        schedule = hours.get(trainer.id) or defaults
+        taken = booked[trainer.id]
+        slots = []
+        for day in days:
+            for entry in schedule:
+                if entry.weekday != day.weekday():
+                    continue
+                for slot in _slots_in(entry, day, tz):
+                    if not_before is not None and slot < not_before:
+                        continue
+                    if not _overlaps(taken, slot, datetime.timedelta(minutes=entry.slot_minutes), duration):
+                        slots.append(slot)
+        result[trainer.id] = sorted(slots)
+    return result
+
+
+def _slots_in(entry, day, tz):
+    step = datetime.timedelta(minutes=entry.slot_minutes)
+    slot = timezone.make_aware(datetime.datetime.combine(day, entry.start_time), tz)
+    end = timezone.make_aware(datetime.datetime.combine(day, entry.end_time), tz)
+    while slot + step <= end:
+        yield slot
+        slot += step
+
+
+def _overlaps(taken, slot, length, duration):
+    # taken is sorted; only the first booking ending after the slot starts can clash
+    index = bisect_right(taken, slot - duration)
+    return index < len(taken) and taken[index] < slot + length
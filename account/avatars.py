@@ -0,0 +1,124 @@
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def submit(fn, *args):
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=settings.AVATAR_WORKERS, thread_name_prefix='avatar')
+    return _executor.submit(_run_job, fn, *args)
+
+
+def _run_job(fn, *args):
+    try:
+        fn(*args)
+    finally:
+        # worker threads hold their own connections; don't leave them open
+        connections.close_all()
+
+
+def stage_avatar(upload):
+    """Copy an uploaded file into the staging directory and return its path."""
+    os.makedirs(settings.AVATAR_STAGING_DIR, exist_ok=True)
+    path = os.path.join(settings.AVATAR_STAGING_DIR, f'{uuid.uuid4().hex}{Path(upload.name).suffix.lower()}')
+    with open(path, 'wb') as staged:
+        for chunk in upload.chunks():
+            staged.write(chunk)
+    return path
+
+
+def queue_avatar(instance, upload):
+    """
+    Stage an upload for instance.avatar and process it on a background thread
+    once the current transaction commits, so the request never waits on image
+    processing or the storage backend. instance must already be saved.
+    """
+    path = stage_avatar(upload)
+    label = instance._meta.label
+    transaction.on_commit(lambda: submit(process_avatar, label, instance.pk, path, upload.name))
+    return path
+
+
+def load_image(source):
+    """Open an image (path or file object) as upright RGB."""
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        return image.convert('RGB')
+
+
+def encode_jpeg(image):
+    out = BytesIO()
+    image.save(out, format='JPEG', quality=85, optimize=True)
+    return out.getvalue()
+
+
+def store_avatar(instance, image, name):
+    """
+    Store image as instance.avatar (capped at AVATAR_MAX_SIZE) plus square
+    thumbnails for each of AVATAR_VARIANT_SIZES, and record their URLs in
+    instance.avatar_variants so serializers never have to ask the storage.
+    The files of the avatar being replaced are released afterwards.
+    """
+    previous = instance.avatar.name or '', instance.avatar_variants
+    full = image.copy()
+    full.thumbnail((settings.AVATAR_MAX_SIZE, settings.AVATAR_MAX_SIZE))
+    instance.avatar.save(name, ContentFile(encode_jpeg(full)), save=False)
+
+    storage = instance.avatar.storage
+    base = instance.avatar.name.rsplit('.', 1)[0]
+    variants = {'original': instance.avatar.url}
+    for size in settings.AVATAR_VARIANT_SIZES:
+        # never upscale a small source
+        side = min(size, *image.size)
+        thumbnail = ImageOps.fit(image, (side, side))
+        stored = storage.save(f'{base}_{size}.jpg', ContentFile(encode_jpeg(thumbnail)))
+        variants[str(size)] = storage.url(stored)
+    instance.avatar_variants = variants
+    instance.save(update_fields=['avatar', 'avatar_variants'])
+    release_avatar(instance, *previous)
+
+
+def release_avatar(instance, name=None, variants=None):
+    """
+    Drop the storage references held by an avatar (instance's current one
+    unless name and variants are given) so gc_media can collect files nothing
+    points at any more. A no-op unless the avatar storage deduplicates
+    (account.storage.ContentAddressedStorage).
+    """
+    storage = instance._meta.get_field('avatar').storage
+    if not hasattr(storage, 'release_urls'):
+        return
+    if name is None:
+        name, variants = instance.avatar.name, instance.avatar_variants
+    if variants:
+        storage.release_urls(variants.values())
+    elif name:
+        storage.delete(name)
+
+
+def process_avatar(label, pk, path, original_name):
+    try:
+        model = apps.get_model(label)
+        instance = model.objects.filter(pk=pk).first()
+        if instance is None:
+            return
+        store_avatar(instance, load_image(path), f'{Path(original_name).stem or "avatar"}.jpg')
+    except Exception:
+        logger.exception("Could not process avatar for %s %s", label, pk)
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
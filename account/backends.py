@@ -1,21 +1,33 @@
-# accounts/backends.py
-
-from django.contrib.auth.backends import BaseBackend
 from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
 
-class EmailAuthBackend(BaseBackend):
-    def authenticate(self, request, email=None, password=None, **kwargs):
-        UserModel = get_user_model()
-        try:
-            user = UserModel.objects.get(email=email)
-            if user.check_password(password):
-                return user
-        except UserModel.DoesNotExist:
-            return None
+from .models import normalize_email
 
-    def get_user(self, user_id):
+
+class EmailAuthBackend(ModelBackend):
+    """
+    Sign in by email, with exactly one indexed lookup and one password hash per attempt.
+
+    Emails are stored lowercased, so the lookup normalizes its input and
+    matches the unique index exactly. Unknown emails still run the hasher
+    once, so they take as long as wrong passwords. check_password() rehashes
+    and saves the password when the hasher settings have moved on.
+    Permissions and get_user() come from ModelBackend.
+    """
+
+    def authenticate(self, request, email=None, password=None, username=None, **kwargs):
         UserModel = get_user_model()
+        # the admin login passes the email as username
+        email = email if email is not None else username
+        # JSON bodies can carry lists or numbers; those are just wrong credentials
+        if not isinstance(email, str) or not isinstance(password, str):
+            return None
         try:
-            return UserModel.objects.get(pk=user_id)
+            user = UserModel._default_manager.get(email=normalize_email(email))
         except UserModel.DoesNotExist:
+            # the same work as a wrong password, so timing doesn't reveal which emails exist
+            UserModel().set_password(password)
             return None
+        if user.check_password(password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware for bodies of at least COMPRESS_MIN_BYTES.
+
+    Clients opt in with Accept-Encoding: gzip; everyone else gets the plain
+    body. Small answers (errors, single objects) are sent as they are:
+    compressing them costs more CPU than it saves on the wire. Streamed
+    responses, such as the calendar feed, are always compressed.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.COMPRESS_MIN_BYTES:
+            return response
+        return super().process_response(request, response)
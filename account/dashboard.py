@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.db.models import Count, Q
+from django.utils.timezone import now
+
+from .models import Booking
+from .serializers import BookingSerializer, UpcomingBookingSerializer, UserAccountSerializer
+
+SECTIONS = ('user', 'upcoming', 'past', 'counts')
+
+
+def participant_filter(customer, trainer):
+    """Bookings the caller takes part in, under whichever role profiles they have."""
+    condition = Q(pk__in=[])
+    if customer is not None:
+        condition |= Q(customer=customer)
+    if trainer is not None:
+        condition |= Q(trainer=trainer)
+    return condition
+
+
+def build_dashboard(request, sections, limits):
+    """
+    The requested sections of the caller's dashboard. Costs no query for
+    "user" (the auth query joined the profiles in) and one query each for
+    "upcoming", "past" and "counts".
+    """
+    customer, trainer = request.customer, request.trainer
+    bookings = Booking.objects.filter(participant_filter(customer, trainer))
+    current = now()
+    data = {'role': request.user.role}
+
+    if 'user' in sections:
+        data['user'] = UserAccountSerializer(request.user, context={'request': request}).data
+        data['user']['contact_number'] = (customer or trainer).contact_number
+    if 'upcoming' in sections:
+        rows = bookings.with_participants().filter(start_time__gte=current).order_by('start_time', 'id')
+        data['upcoming'] = UpcomingBookingSerializer(rows[:limits['upcoming']], many=True).data
+    if 'past' in sections:
+        rows = bookings.with_participants().filter(start_time__lt=current).order_by('-start_time', '-id')
+        data['past'] = BookingSerializer(rows[:limits['past']], many=True).data
+    if 'counts' in sections:
+        data['counts'] = bookings.aggregate(
+            upcoming=Count('id', filter=Q(start_time__gte=current)),
+            past=Count('id', filter=Q(start_time__lt=current)),
+        )
+    return data
+
+
+def parse_limit(value):
+    """A section size from the query string, defaulting and capping like the listings."""
+    if value is None:
+        return settings.DASHBOARD_SESSIONS
+    limit = int(value)
+    if limit < 0:
+        raise ValueError(value)
+    return min(limit, settings.BOOKING_MAX_PAGE_SIZE)
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .availability import open_slots
+from .models import TrainerProfile
+from .shared_store import shared_store
+
+DIRECTORY_CACHE_KEY = 'account:trainer-directory'
+# keys of each directory entry; trainer_list's ?fields= picks from these
+DIRECTORY_FIELDS = (
+    'id', 'trainer_id', 'slug', 'name', 'specialization', 'phonenumber', 'instagram', 'twitter', 'availableTimes',
+)
+
+
+def directory_cache_key():
+    # today's open slots are part of the payload, so each day gets its own entry; the
+    # cache is per process, so invalidation bumps a version every worker reads
+    version = shared_store.version(DIRECTORY_CACHE_KEY)
+    return f'{DIRECTORY_CACHE_KEY}:{version}:{timezone.localdate().isoformat()}'
+
+
+def build_trainer_directory():
+    """Build the public trainer directory payload with a fixed number of queries."""
+    profiles = list(TrainerProfile.objects.select_related('trainer__user').order_by('id'))
+    today = timezone.localdate()
+    slots = open_slots([ind.trainer for ind in profiles], today, today, not_before=timezone.now())
+    data = []
+    for ind in profiles:
+        data.append({
+            "id": ind.id,
+            "trainer_id": ind.trainer_id,
+            "slug": ind.trainer.slug,
+            "name": f"{ind.trainer.user.firstname} {ind.trainer.user.lastname}",  # comes from User model
+            "specialization": ind.trainer.specialization,
+            "phonenumber": ind.trainer.contact_number,
+            "instagram": ind.instagram,
+            "twitter": ind.twitter,
+            "availableTimes": [slot.strftime("%I:%M %p") for slot in slots[ind.trainer_id]],
+        })
+    return data
+
+
+def get_trainer_directory():
+    """
+    Return the cached directory entry, rebuilding it on a miss.
+
+    The entry is a dict with the payload under "data" plus the "etag" and
+    "last_modified" (epoch seconds) used for conditional requests.
+    """
+    key = directory_cache_key()
+    entry = cache.get(key)
+    if entry is None:
+        data = build_trainer_directory()
+        digest = hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+        entry = {'data': data, 'etag': f'"{digest}"', 'last_modified': int(time.time())}
+        cache.set(key, entry, settings.TRAINER_DIRECTORY_CACHE_TIMEOUT)
+    return entry
+
+
+def invalidate_trainer_directory():
+    """Retire the cached directory in every process, including other commands' and workers'."""
+    shared_store.bump(DIRECTORY_CACHE_KEY)
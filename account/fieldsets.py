@@ -0,0 +1,32 @@
+from rest_framework.exceptions import ValidationError
+
+FIELDS_QUERY_PARAM = 'fields'
+
+
+def requested_fields(request, available):
+    """
+    The names in ?fields=a,b,c as a set, or None when the parameter is absent
+    (meaning every field). Unknown names are a 400, so typos don't silently
+    return less than the client expected.
+    """
+    raw = request.query_params.get(FIELDS_QUERY_PARAM)
+    if raw is None:
+        return None
+    fields = {name.strip() for name in raw.split(',') if name.strip()}
+    unknown = fields - set(available)
+    if unknown or not fields:
+        problem = f"Unknown field(s): {', '.join(sorted(unknown))}." if unknown else "No fields given."
+        raise ValidationError({FIELDS_QUERY_PARAM: [f"{problem} Choose from {', '.join(available)}."]})
+    return fields
+
+
+def select_columns(queryset, columns):
+    """
+    Load only these columns, joining just the relations they traverse
+    (e.g. "trainer__user__firstname" joins trainer and its user).
+    """
+    related = {column.rsplit('__', 1)[0] for column in columns if '__' in column}
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*sorted(related))
+    return queryset.only(*columns)
@@ -0,0 +1,102 @@
+import hashlib
+from datetime import timezone as dt_timezone
+
+from django.db.models import Count, Max, Q
+from django.db.models.functions import Greatest
+
+from .availability import session_duration
+from .models import Booking
+from .permissions import get_profile
+
+PRODID = '-//WinnyFit//Sessions//EN'
+
+
+def escape(text):
+    """Escape a TEXT value (RFC 5545 section 3.3.11)."""
+    return (text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+            .replace('\r\n', '\\n').replace('\n', '\\n'))
+
+
+def fold(line):
+    """Fold a content line to 75 octets, continuation lines starting with a space."""
+    encoded = line.encode()
+    if len(encoded) <= 75:
+        return line + '\r\n'
+    parts, start, limit = [], 0, 75
+    while start < len(encoded):
+        end = min(start + limit, len(encoded))
+        # never split a multi-byte character
+        while end < len(encoded) and (encoded[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(encoded[start:end].decode())
+        start, limit = end, 74
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def stamp(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def feed_bookings(user):
+    """Every booking the user takes part in, as customer or as trainer."""
+    participant = Q()
+    customer = get_profile(user, 'customer_profile')
+    trainer = get_profile(user, 'staff_profile')
+    if customer is not None:
+        participant |= Q(customer_id=customer.pk)
+    if trainer is not None:
+        participant |= Q(trainer_id=trainer.pk)
+    if not participant:
+        return Booking.objects.none()
+    return Booking.objects.filter(participant)
+
+
+def feed_version(user, bookings):
+    """
+    (etag, last_modified epoch seconds or None) for a feed, from one aggregate
+    query. The count catches deletions, which leave no updated_at behind, and
+    the participants' updated_at catches a renamed trainer or customer.
+    """
+    summary = bookings.aggregate(
+        count=Count('id'), last=Max('id'), changed=Greatest(
+            Max('updated_at'), Max('trainer__user__updated_at'), Max('customer__user__updated_at'),
+        ),
+    )
+    changed = summary['changed']
+    raw = f"{user.pk}:{user.fullname()}:{summary['count']}:{summary['last']}:{changed and changed.isoformat()}"
+    return f'"{hashlib.md5(raw.encode()).hexdigest()}"', changed and int(changed.timestamp())
+
+
+def render_feed(user, bookings, chunk_size=500):
+    """Yield the feed as text, one event at a time, reading bookings with iterator()."""
+    duration = session_duration()
+    yield ''.join(fold(line) for line in (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        f'PRODID:{PRODID}',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape(f"WinnyFit sessions - {user.fullname()}")}',
+    ))
+    rows = bookings.select_related('trainer__user', 'customer__user').only(
+        'id', 'title', 'session_type', 'start_time', 'meeting_id', 'updated_at',
+        'trainer__user__firstname', 'trainer__user__lastname',
+        'customer__user__firstname', 'customer__user__lastname',
+    ).order_by('start_time', 'id')
+    for booking in rows.iterator(chunk_size=chunk_size):
+        trainer, customer = booking.trainer.user, booking.customer.user
+        other = customer if trainer.pk == user.pk else trainer
+        lines = [
+            'BEGIN:VEVENT',
+            f'UID:booking-{booking.pk}@winnyfit',
+            f'DTSTAMP:{stamp(booking.updated_at)}',
+            f'LAST-MODIFIED:{stamp(booking.updated_at)}',
+            f'DTSTART:{stamp(booking.start_time)}',
+            f'DTEND:{stamp(booking.start_time + duration)}',
+            f'SUMMARY:{escape(f"{booking.title} with {other.fullname()}")}',
+        ]
+        if booking.session_type != 'in-person':
+            lines += [f'URL:{booking.meeting_url}', f'DESCRIPTION:{escape(f"Join: {booking.meeting_url}")}']
+        lines.append('END:VEVENT')
+        yield ''.join(fold(line) for line in lines)
+    yield fold('END:VCALENDAR')
@@ -0,0 +1,91 @@
+import functools
+import json
+
+from django.conf import settings
+from django.utils.crypto import salted_hmac
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .shared_store import shared_store
+
+HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = 255
+
+
+def fingerprint(request):
+    """A keyed hash of what was asked for, so a reused key with another payload is caught."""
+    payload = json.dumps(request.data, sort_keys=True, default=str)
+    return salted_hmac('account.idempotency', f'{request.method}\n{request.path}\n{payload}').hexdigest()
+
+
+def store_key(request, key):
+    """Keys are scoped to the route and the signed-in user."""
+    user = request.user.pk if request.user and request.user.is_authenticated else '-'
+    return f'{request.path}:{user}:{key}'
+
+
+def has_stored_reply(request):
+    """Whether this request's Idempotency-Key already has a response to replay."""
+    key = request.headers.get(HEADER)
+    if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+        return False
+    return shared_store.stored(store_key(request, key))
+
+
+def idempotent(view):
+    """
+    Let clients retry a POST safely by sending an Idempotency-Key header.
+
+    The first request with a key runs the view; a successful (2xx) response
+    is stored in the shared store and replayed, marked Idempotent-Replayed,
+    for every retry within IDEMPOTENCY_TTL, without running the view again.
+    Other outcomes aren't stored, so a failed attempt can be retried. Keys
+    are scoped to the route and the signed-in user. Reusing a key with a
+    different payload answers 422; retrying while the first request is
+    still running answers 409. Requests without the header run as usual.
+
+    Wraps a DRF handler taking the DRF request, e.g. below @api_view or via
+    method_decorator on an APIView method. Throttles run before the handler,
+    so the view's throttles should set skip_replays for retries to be
+    answered from the store instead of using up the rate limit.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if key is None:
+            return view(request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH or not key.isprintable():
+            return Response({"error": f"{HEADER} must be 1-{MAX_KEY_LENGTH} printable characters"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        claimed = store_key(request, key)
+        digest = fingerprint(request)
+        existing = shared_store.claim(claimed, digest, settings.IDEMPOTENCY_LOCK_SECONDS,
+                                      settings.IDEMPOTENCY_MAX_ENTRIES)
+        if existing is not None:
+            return replay(digest, *existing)
+
+        try:
+            response = view(request, *args, **kwargs)
+        except BaseException:
+            shared_store.release(claimed)
+            raise
+        if status.is_success(response.status_code) and isinstance(response, Response):
+            body = json.dumps(response.data, cls=JSONEncoder)
+            shared_store.complete(claimed, response.status_code, body, settings.IDEMPOTENCY_TTL)
+        else:
+            shared_store.release(claimed)
+        return response
+    return wrapper
+
+
+def replay(digest, stored_digest, stored_status, body):
+    if stored_digest != digest:
+        return Response({"error": f"This {HEADER} was already used for a different request"},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    if stored_status is None:
+        return Response({"error": f"A request with this {HEADER} is still being processed"},
+                        status=status.HTTP_409_CONFLICT, headers={'Retry-After': '1'})
+    return Response(json.loads(body), status=stored_status, headers={REPLAYED_HEADER: 'true'})
@@ -0,0 +1,190 @@
+import asyncio
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO
+
+from django.core.asgi import get_asgi_application
+from django.core.management.base import BaseCommand
+from django.core.wsgi import get_wsgi_application
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.timezone import now
+from rest_framework.authtoken.models import Token
+
+from account.models import UserAccount, Customer, Trainer, Booking
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare WSGI and ASGI serving of the booking dashboard endpoints at the "
+        "same worker count. WSGI workers handle one request at a time each; "
+        "ASGI workers each run an event loop with --concurrency requests in "
+        "flight. Requests go straight to the WSGI/ASGI application callables, "
+        "so no server is needed. Seed data is committed and deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--concurrency', type=int, default=50, help="In-flight requests per ASGI worker")
+        parser.add_argument('--requests', type=int, default=1000)
+        parser.add_argument('--db-latency', type=float, default=2.0,
+                            help="Milliseconds added to every query, to model a database across the network")
+        parser.add_argument('--path', action='append',
+                            help="Endpoint to poll (repeatable); defaults to the customer and trainer upcoming lists")
+
+    def handle(self, *args, **options):
+        customer_token, trainer_token = self.seed()
+        paths = options['path'] or ['/api/bookings/upcoming/', '/api/bookings/trainer/upcoming/']
+        tokens = {'/api/bookings/trainer/upcoming/': trainer_token}
+        self.targets = [(path, tokens.get(path, customer_token)) for path in paths]
+
+        delay = options['db_latency'] / 1000
+
+        def slow_query(execute, sql, params, many, context):
+            time.sleep(delay)
+            return execute(sql, params, many, context)
+
+        def add_latency(sender, connection, **kwargs):
+            # fires on every reconnect of the same per-thread wrapper
+            if slow_query not in connection.execute_wrappers:
+                connection.execute_wrappers.append(slow_query)
+
+        connection_created.connect(add_latency)
+        try:
+            connections.close_all()
+            self.report('WSGI', self.run_wsgi(options), options)
+            connections.close_all()
+            self.report('ASGI', self.run_asgi(options), options)
+        finally:
+            connection_created.disconnect(add_latency)
+            connections.close_all()
+            self.cleanup()
+
+    def seed(self):
+        self.tag = uuid.uuid4().hex[:8]
+        customer_user = UserAccount.objects.create(
+            email=f'bench-asgi-{self.tag}-c@example.com', firstname='Bench', lastname='Customer',
+            role='customer', password='!')
+        trainer_user = UserAccount.objects.create(
+            email=f'bench-asgi-{self.tag}-t@example.com', firstname='Bench', lastname='Trainer',
+            role='trainer', password='!')
+        customer = Customer.objects.create(user=customer_user, contact_number=f'bench-{self.tag}')
+        trainer = Trainer.objects.create(user=trainer_user, contact_number=f'bench-{self.tag}', address='Bench')
+        start = now() + timedelta(hours=1)
+        Booking.objects.bulk_create([
+            Booking(customer=customer, trainer=trainer, title='Bench Session', session_type='virtual',
+                    start_time=start + timedelta(hours=i), meeting_id=f'bench-{self.tag}-{i}')
+            for i in range(40)
+        ])
+        self.users = [customer_user.pk, trainer_user.pk]
+        return Token.objects.create(user=customer_user).key, Token.objects.create(user=trainer_user).key
+
+    def cleanup(self):
+        UserAccount.objects.filter(pk__in=self.users).delete()
+
+    def run_wsgi(self, options):
+        app = get_wsgi_application()
+        counter = iter(range(options['requests']))
+        lock = threading.Lock()
+        latencies = []
+
+        def worker():
+            while True:
+                with lock:
+                    i = next(counter, None)
+                if i is None:
+                    return
+                path, token = self.targets[i % len(self.targets)]
+                started = time.perf_counter()
+                status = wsgi_get(app, path, token)
+                elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append((status, elapsed))
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['workers']) as pool:
+            for _ in range(options['workers']):
+                pool.submit(worker)
+        return latencies, time.perf_counter() - started
+
+    def run_asgi(self, options):
+        app = get_asgi_application()
+        latencies = []
+        lock = threading.Lock()
+        per_worker = -(-options['requests'] // options['workers'])
+
+        async def worker(count):
+            semaphore = asyncio.Semaphore(options['concurrency'])
+
+            async def one(i):
+                path, token = self.targets[i % len(self.targets)]
+                async with semaphore:
+                    started = time.perf_counter()
+                    status = await asgi_get(app, path, token)
+                    elapsed = time.perf_counter() - started
+                with lock:
+                    latencies.append((status, elapsed))
+
+            await asyncio.gather(*(one(i) for i in range(count)))
+
+        started = time.perf_counter()
+        # one event loop per worker, each in its own thread, like separate uvicorn workers
+        with ThreadPoolExecutor(options['workers']) as pool:
+            for _ in range(options['workers']):
+                pool.submit(asyncio.run, worker(per_worker))
+        return latencies, time.perf_counter() - started
+
+    def report(self, label, result, options):
+        latencies, elapsed = result
+        errors = sum(1 for status, _ in latencies if status != 200)
+        times = sorted(seconds * 1000 for _, seconds in latencies)
+        p50, p95 = (statistics.quantiles(times, n=100)[q - 1] for q in (50, 95)) if len(times) > 1 else (0, 0)
+        in_flight = options['workers'] * (options['concurrency'] if label == 'ASGI' else 1)
+        self.stdout.write(
+            f"{label}: {len(latencies) / elapsed:8.1f} req/s with {options['workers']} workers "
+            f"({in_flight} in flight), p50 {p50:.1f} ms, p95 {p95:.1f} ms, {errors} errors"
+        )
+
+
+def wsgi_get(app, path, token):
+    status = []
+    environ = {
+        'REQUEST_METHOD': 'GET', 'PATH_INFO': path, 'QUERY_STRING': '', 'SCRIPT_NAME': '',
+        'SERVER_NAME': 'localhost', 'SERVER_PORT': '80', 'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': 'localhost', 'HTTP_AUTHORIZATION': f'Token {token}',
+        'wsgi.input': BytesIO(), 'wsgi.url_scheme': 'http', 'wsgi.errors': BytesIO(),
+    }
+    response = app(environ, lambda line, headers, exc_info=None: status.append(int(line.split()[0])))
+    try:
+        b''.join(response)
+    finally:
+        response.close()
+    return status[0]
+
+
+async def asgi_get(app, path, token):
+    status = []
+    body = iter([{'type': 'http.request', 'body': b'', 'more_body': False}])
+
+    async def receive():
+        message = next(body, None)
+        if message is None:
+            # the client stays connected; the handler cancels this once it responds
+            await asyncio.Future()
+        return message
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await app({
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'query_string': b'', 'root_path': '',
+        'headers': [(b'host', b'localhost'), (b'authorization', f'Token {token}'.encode())],
+        'client': ('127.0.0.1', 0), 'server': ('localhost', 80),
+    }, receive, send)
+    return status[0]
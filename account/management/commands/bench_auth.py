@@ -0,0 +1,56 @@
+import time
+from unittest import mock
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from account.authentication import CachedTokenAuthentication, token_cache
+from account.models import UserAccount, Customer
+from account.querylog import capture_queries
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare requests per second on an authenticated endpoint with and "
+        "without the token cache. Runs in-process and rolls back its data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--path', default='/api/bookings/upcoming/')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = UserAccount.objects.create(
+                email='bench-auth@example.com', firstname='Bench', lastname='Auth', role='customer', password='!'
+            )
+            Customer.objects.create(user=user, contact_number='bench-auth')
+            token = Token.objects.create(user=user)
+            client = Client(HTTP_AUTHORIZATION=f'Token {token.key}', HTTP_HOST='localhost')
+
+            uncached = TokenAuthentication.authenticate_credentials
+            with mock.patch.object(CachedTokenAuthentication, 'authenticate_credentials', uncached):
+                self.run('without cache', client, options)
+            token_cache.clear()
+            self.run('with cache', client, options)
+
+            transaction.set_rollback(True)
+
+    def run(self, label, client, options):
+        path, count = options['path'], options['requests']
+        client.get(path)  # warm up
+        with capture_queries() as queries:
+            client.get(path)
+        started = time.perf_counter()
+        for _ in range(count):
+            response = client.get(path)
+        elapsed = time.perf_counter() - started
+        if response.status_code != 200:
+            self.stderr.write(f"{path} answered {response.status_code}")
+        self.stdout.write(
+            f"{label:>14}: {count / elapsed:8.1f} req/s, {elapsed / count * 1000:.3f} ms/req, "
+            f"{len(queries)} queries/req"
+        )
@@ -0,0 +1,131 @@
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils.timezone import now
+
+from account.models import UserAccount, Customer, Trainer, Booking
+from account.pagination import BookingCursorPagination
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic booking table and report EXPLAIN plans and timings "
+        "for the queries behind the booking listing endpoints. "
+        "The seeded rows are rolled back unless --keep is passed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bookings', type=int, default=100_000)
+        parser.add_argument('--customers', type=int, default=500)
+        parser.add_argument('--trainers', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=20, help="Timed runs per query")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help="Keep the seeded rows")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            customer, trainer = self.seed(options)
+            self.analyze()
+            self.report(customer, trainer, options['repeat'])
+            if not options['keep']:
+                transaction.set_rollback(True)
+
+    def seed(self, options):
+        rng = random.Random(options['seed'])
+        tag = rng.getrandbits(32)
+        started = time.perf_counter()
+
+        users = UserAccount.objects.bulk_create([
+            UserAccount(email=f'bench-{tag}-{role}-{i}@example.com', firstname='Bench', lastname=f'{role}{i}',
+                        role=role, password='!')
+            for role, count in (('customer', options['customers']), ('trainer', options['trainers']))
+            for i in range(count)
+        ])
+        customers = Customer.objects.bulk_create([
+            Customer(user=user, contact_number=f'c{tag}{i}')
+            for i, user in enumerate(users[:options['customers']])
+        ])
+        trainers = Trainer.objects.bulk_create(Trainer.fill_derived_fields([
+            Trainer(user=user, contact_number=f't{tag}{i}', address='Bench', slug=f'bench-{tag}-{i}')
+            for i, user in enumerate(users[options['customers']:])
+        ]))
+
+        # spread sessions two years either side of today
+        origin = now() - timedelta(days=730)
+        batch = []
+        for i in range(options['bookings']):
+            batch.append(Booking(
+                customer=rng.choice(customers),
+                trainer=rng.choice(trainers),
+                title='Bench Session',
+                session_type='virtual',
+                start_time=origin + timedelta(minutes=30 * rng.randrange(2 * 730 * 48)),
+                meeting_id=f'bench-{tag}-{i}',
+            ))
+            if len(batch) == 5000:
+                # a trainer can't hold two sessions in one slot; drop random collisions
+                Booking.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        Booking.objects.bulk_create(batch, ignore_conflicts=True)
+
+        self.stdout.write(
+            f"Seeded {Booking.objects.filter(meeting_id__startswith=f'bench-{tag}-').count()} bookings, "
+            f"{options['customers']} customers and "
+            f"{options['trainers']} trainers in {time.perf_counter() - started:.1f}s"
+        )
+        return customers[0], trainers[0]
+
+    def analyze(self):
+        # refresh planner statistics so the plans reflect the seeded volume
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {connection.ops.quote_name(Booking._meta.db_table)}')
+
+    def report(self, customer, trainer, repeat):
+        current = now()
+        bookings = Booking.objects.with_participants()
+        # the same filters the listing views apply before paginating
+        listings = {
+            'bookings/upcoming/': bookings.filter(customer=customer, start_time__gte=current),
+            'bookings/past/': bookings.filter(customer=customer, start_time__lte=current),
+            'bookings/trainer/upcoming/': bookings.filter(trainer=trainer, start_time__gte=current),
+            'bookings/trainer/past/': bookings.filter(trainer=trainer, start_time__lte=current),
+        }
+        paginator = BookingCursorPagination()
+        size = settings.BOOKING_PAGE_SIZE
+
+        for endpoint, listing in listings.items():
+            total = listing.count()
+            first = paginator.keyset_queryset(listing, None)[:size + 1]
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f"\n{endpoint} ({total} rows for this user)"))
+            self.stdout.write(first.explain())
+            self.stdout.write(f"  first page: {self.time(first, repeat)}")
+
+            if total:
+                # a cursor halfway through the listing stands in for a deep page
+                middle = listing.order_by('start_time', 'id')[total // 2]
+                deep = paginator.keyset_queryset(listing, (middle.start_time, middle.id, False))[:size + 1]
+                plan = deep.explain()
+                self.stdout.write(plan)
+                if sorts_rows(plan):
+                    raise CommandError(f"{endpoint}: the deep-page plan sorts the remaining rows instead of "
+                                       "reading them in index order")
+                self.stdout.write(f"  deep page:  {self.time(deep, repeat)}")
+
+    def time(self, queryset, repeat):
+        timings = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - started) * 1000)
+        return f"median {statistics.median(timings):.2f} ms, max {max(timings):.2f} ms over {repeat} runs"
+
+
+def sorts_rows(plan):
+    """Whether a query plan sorts (SQLite's temp B-tree, PostgreSQL's Sort node) rather than walking an index."""
+    return 'TEMP B-TREE' in plan.upper() or any(line.strip(' ->').startswith('Sort') for line in plan.splitlines())
@@ -0,0 +1,107 @@
+import logging
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model, hashers
+from django.contrib.auth.backends import BaseBackend
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from account.models import UserAccount, Customer
+from account.querylog import capture_queries
+
+
+SETUPS = (
+    # the backends before sign-in was reduced to one lookup and one hash
+    ('old', ['account.management.commands.bench_login.LegacyEmailAuthBackend',
+             'django.contrib.auth.backends.ModelBackend']),
+    ('new', ['account.backends.EmailAuthBackend']),
+)
+
+
+class LegacyEmailAuthBackend(BaseBackend):
+    """The email backend as it was, kept to time the old setup against the new one."""
+
+    def authenticate(self, request, email=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        try:
+            user = UserModel.objects.get(email=email)
+            if user.check_password(password):
+                return user
+        except UserModel.DoesNotExist:
+            return None
+
+    def get_user(self, user_id):
+        UserModel = get_user_model()
+        try:
+            return UserModel.objects.get(pk=user_id)
+        except UserModel.DoesNotExist:
+            return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Time sign-in attempts (success, wrong password, unknown email) through /api/signin/ "
+        "with the configured password hasher, reporting CPU time, password hashes and "
+        "queries per attempt, for the old two-backend setup and the current one. "
+        "Runs in-process with rate limits off and rolls back its data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--attempts', type=int, default=20, help="Attempts per case")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = UserAccount.objects.create_user('bench-login@example.com', 'Bench', 'Login',
+                                                   password='bench-pass', role='customer')
+            Customer.objects.create(user=user, contact_number='bench-login')
+            client = Client(HTTP_HOST='localhost')
+            cases = (
+                # the old backends matched emails case-sensitively
+                ('success', 'bench-login@example.com', 'bench-pass', 200),
+                ('wrong password', 'bench-login@example.com', 'not-the-pass', 400),
+                ('unknown email', 'nobody-bench@example.com', 'bench-pass', 400),
+            )
+            # failed sign-ins answer 400, which django.request would log per attempt
+            request_logger = logging.getLogger('django.request')
+            level = request_logger.level
+            request_logger.setLevel(logging.ERROR)
+            try:
+                cpu = {}
+                with override_settings(THROTTLE_RATES=dict.fromkeys(settings.THROTTLE_RATES)):
+                    for setup, backends in SETUPS:
+                        self.stdout.write(f"{setup} backends: {', '.join(backends)}")
+                        with override_settings(AUTHENTICATION_BACKENDS=backends):
+                            for label, email, password, expected in cases:
+                                cpu[setup, label] = self.run(client, label, {'email': email, 'password': password},
+                                                             expected, options['attempts'])
+                for label, _, _, expected in cases:
+                    if expected != 200:
+                        old, new = cpu['old', label], cpu['new', label]
+                        self.stdout.write(f"{label:>15}: {old * 1000:8.2f} -> {new * 1000:8.2f} ms CPU/attempt, "
+                                          f"{new / old:.0%} of the old cost")
+            finally:
+                request_logger.setLevel(level)
+            transaction.set_rollback(True)
+
+    def run(self, client, label, payload, expected, attempts):
+        path = reverse('signin')
+        client.post(path, payload)  # warm up
+        # count the hashing entry points AbstractBaseUser uses
+        with mock.patch('django.contrib.auth.base_user.check_password', wraps=hashers.check_password) as check, \
+                mock.patch('django.contrib.auth.base_user.make_password', wraps=hashers.make_password) as make, \
+                capture_queries() as queries:
+            cpu, wall = time.process_time(), time.perf_counter()
+            for _ in range(attempts):
+                response = client.post(path, payload)
+            cpu, wall = time.process_time() - cpu, time.perf_counter() - wall
+        if response.status_code != expected:
+            self.stderr.write(f"{label}: expected {expected}, got {response.status_code}")
+        self.stdout.write(
+            f"{label:>15}: {cpu / attempts * 1000:8.2f} ms CPU/attempt, {wall / attempts * 1000:8.2f} ms wall, "
+            f"{(check.call_count + make.call_count) / attempts:.1f} hashes, {len(queries) / attempts:.1f} queries"
+        )
+        return cpu / attempts
@@ -0,0 +1,102 @@
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.authtoken.models import Token
+
+from account.models import Customer, UserAccount
+from account.querylog import capture_queries
+from account.serializers import UserAccountSerializer
+from account.views import CustomerRegisterView
+
+
+class LegacyCustomerCreateSerializer(serializers.ModelSerializer):
+    """
+    Customer signup as it was, kept to bench against: every field checks its
+    own uniqueness, then create() validates the nested user a second time.
+    """
+    user = UserAccountSerializer()
+
+    class Meta:
+        model = Customer
+        fields = ['user', 'contact_number']
+
+    def create(self, validated_data):
+        user_data = validated_data.pop('user')
+        user_serializer = UserAccountSerializer(data=user_data)
+        user_serializer.is_valid(raise_exception=True)
+        user = user_serializer.save()
+        return Customer.objects.create(user=user, **validated_data)
+
+
+class Command(BaseCommand):
+    help = (
+        "Register customers and trainers through the API in-process and report "
+        "registrations per second and database round trips per registration, with customer "
+        "signup also run through its old double-validation serializer for comparison. "
+        "Rate limits are off for the run and everything is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Registrations per endpoint")
+        parser.add_argument(
+            '--cheap-hash', action='store_true',
+            help="Hash passwords with MD5 so the timings show the database work rather than PBKDF2",
+        )
+
+    def handle(self, *args, **options):
+        if options['cheap_hash']:
+            with override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher']):
+                self.bench(options)
+        else:
+            self.bench(options)
+
+    def bench(self, options):
+        with transaction.atomic():
+            staff = UserAccount.objects.create(
+                email='bench-signup@example.com', firstname='Bench', lastname='Signup',
+                role='administrative', is_staff=True, password='!',
+            )
+            token = Token.objects.create(user=staff)
+            client = Client(HTTP_HOST='localhost')
+
+            def customer(n, prefix='bench'):
+                return client.post(reverse('customer-register'), {
+                    'user': {'email': f'{prefix}-signup-{n}@example.com', 'firstname': 'Bench',
+                             'lastname': f'Customer{n}', 'password': 'bench-pass'},
+                    'contact_number': f'{prefix}-c{n}',
+                }, content_type='application/json')
+
+            def trainer(n):
+                return client.post(reverse('trainer-register'), {
+                    'email': f'bench-coach-{n}@example.com', 'firstname': 'Bench', 'lastname': f'Coach{n}',
+                    'password': 'bench-pass',
+                    'trainer': {'contact_number': f'bench-t{n}', 'address': 'Bench', 'profile': {'bio': 'Bench.'}},
+                }, content_type='application/json', HTTP_AUTHORIZATION=f'Token {token.key}')
+
+            with override_settings(THROTTLE_RATES=dict.fromkeys(settings.THROTTLE_RATES)):
+                with mock.patch.object(CustomerRegisterView, 'serializer_class', LegacyCustomerCreateSerializer):
+                    self.run('customer (old)', lambda n: customer(n, prefix='old'), options['requests'])
+                self.run('customer', customer, options['requests'])
+                self.run('trainer', trainer, options['requests'])
+            transaction.set_rollback(True)
+
+    def run(self, label, register, count):
+        failures = 0
+        with capture_queries() as queries:
+            started = time.perf_counter()
+            for n in range(count):
+                response = register(n)
+                failures += response.status_code != 201
+            elapsed = time.perf_counter() - started
+        if failures:
+            self.stderr.write(f"{label}: {failures} registrations failed (last answer {response.status_code})")
+        self.stdout.write(
+            f"{label:>14}: {count / elapsed:8.1f} signups/s, {elapsed / count * 1000:.3f} ms/signup, "
+            f"{len(queries) / count:.1f} queries/signup (+{queries.savepoints / count:.0f} savepoint statements)"
+        )
@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from account.avatars import load_image, store_avatar
+from account.models import UserAccount, TrainerProfile
+
+
+class Command(BaseCommand):
+    help = "Generate thumbnail variants for avatars stored before variants existed."
+
+    def handle(self, *args, **options):
+        for model in (UserAccount, TrainerProfile):
+            pending = model.objects.exclude(Q(avatar='') | Q(avatar__isnull=True)).filter(avatar_variants={})
+            done = failed = 0
+            for instance in pending.iterator():
+                try:
+                    with instance.avatar.open('rb') as source:
+                        image = load_image(source)
+                    store_avatar(instance, image, f'{Path(instance.avatar.name).stem}.jpg')
+                    done += 1
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"{model.__name__} {instance.pk}: {e}")
+            self.stdout.write(f"{model.__name__}: {done} updated, {failed} failed")
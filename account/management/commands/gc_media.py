@@ -0,0 +1,61 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from account.models import StoredFile
+from account.storage import avatar_storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete deduplicated media files that nothing references any more. "
+        "Files released within the grace period are kept, so an upload racing "
+        "the collector can still pick them up again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--grace', type=int, default=settings.MEDIA_GC_GRACE_SECONDS,
+                            help="Only collect files unreferenced for at least this many seconds")
+        parser.add_argument('--batch-size', type=int, default=200)
+        parser.add_argument('--dry-run', action='store_true', help="List what would be deleted")
+
+    def handle(self, *args, **options):
+        if not settings.AVATAR_DEDUPLICATE:
+            raise CommandError("AVATAR_DEDUPLICATE is off; there is nothing to collect.")
+        backend = avatar_storage.backend
+
+        cutoff = timezone.now() - timedelta(seconds=options['grace'])
+        orphans = StoredFile.objects.filter(refcount=0, updated_at__lt=cutoff).order_by('pk')
+        collected = freed = failed = 0
+        last_pk = 0
+        while True:
+            batch = list(orphans.filter(pk__gt=last_pk).values_list('pk', flat=True)[:options['batch_size']])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            if options['dry_run']:
+                for stored in StoredFile.objects.filter(pk__in=batch):
+                    self.stdout.write(f"would delete {stored.name} ({stored.size} bytes)")
+                    collected += 1
+                    freed += stored.size
+                continue
+            with transaction.atomic():
+                # lock and re-check: a save may have re-referenced a file since the scan
+                for stored in StoredFile.objects.select_for_update().filter(pk__in=batch, refcount=0):
+                    try:
+                        backend.delete(stored.name)
+                    except Exception as e:
+                        failed += 1
+                        self.stderr.write(f"{stored.name}: {e}")
+                        continue
+                    stored.delete()
+                    collected += 1
+                    freed += stored.size
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Would collect' if options['dry_run'] else 'Collected'} {collected} files "
+            f"({freed / 1024:.1f} KiB), {failed} failed"
+        ))
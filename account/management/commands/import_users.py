@@ -0,0 +1,244 @@
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.core.validators import validate_email
+from django.db import DatabaseError, transaction
+from django.utils.dateparse import parse_date
+
+from account.directory import invalidate_trainer_directory
+from account.models import UserAccount, Customer, Trainer, TrainerProfile
+
+TRAINER_FIELDS = ['specialization', 'date_of_birth', 'address', 'available']
+PROFILE_FIELDS = ['instagram', 'facebook', 'twitter', 'linkedin', 'website', 'bio']
+TEXT_FIELDS = ['email', 'firstname', 'lastname', 'password', 'role', 'contact_number'] + TRAINER_FIELDS + PROFILE_FIELDS
+
+
+def column_limits(*tables):
+    """max_length of each named field, for (model, field names) pairs."""
+    fields = (model._meta.get_field(name) for model, names in tables for name in names)
+    return {field.name: field.max_length for field in fields if field.max_length}
+
+
+# checked up front: PostgreSQL refuses longer values with a DataError
+USER_LIMITS = column_limits((UserAccount, ['email', 'firstname', 'lastname']))
+COLUMN_LIMITS = {
+    'customer': {**USER_LIMITS, **column_limits((Customer, ['contact_number']))},
+    'trainer': {**USER_LIMITS, **column_limits((Trainer, ['contact_number'] + TRAINER_FIELDS),
+                                               (TrainerProfile, PROFILE_FIELDS))},
+}
+
+
+def _init_worker():
+    # spawned (non-forked) workers need their own app registry to hash passwords
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-create customers and trainers from a CSV or JSONL file. "
+        "Columns: email, firstname, lastname, password, role (customer|trainer), contact_number, "
+        "and for trainers optionally " + ", ".join(TRAINER_FIELDS + PROFILE_FIELDS) + ". "
+        "Passwords are hashed across a process pool; bad rows are reported and skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Input file, or - for stdin")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help="Defaults to the file extension")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--dry-run', action='store_true', help="Validate and hash but roll back")
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or ('jsonl' if options['path'].endswith(('.jsonl', '.ndjson')) else 'csv')
+        self.created = self.failed = 0
+        self.slugs = set()
+        started = time.perf_counter()
+
+        try:
+            handle = sys.stdin if options['path'] == '-' else open(options['path'], newline='', encoding='utf-8')
+        except OSError as e:
+            raise CommandError(f"Cannot read {options['path']}: {e}")
+        try:
+            rows = self.read(handle, fmt)
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_init_worker) as pool:
+                while True:
+                    chunk = list(islice(rows, options['batch_size']))
+                    if not chunk:
+                        break
+                    self.import_chunk(chunk, pool, options['dry_run'])
+        finally:
+            if handle is not sys.stdin:
+                handle.close()
+
+        if self.created and not options['dry_run']:
+            invalidate_trainer_directory()
+
+        elapsed = time.perf_counter() - started
+        total = self.created + self.failed
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Validated' if options['dry_run'] else 'Imported'} {self.created} of {total} rows "
+            f"in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f} rows/s), {self.failed} failed"
+        ))
+
+    def read(self, handle, fmt):
+        """Yield (line number, row dict) pairs without loading the whole file."""
+        if fmt == 'csv':
+            reader = csv.DictReader(handle)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_num, line in enumerate(handle, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = {'__error__': f"invalid JSON: {e}"}
+            yield line_num, row
+
+    def error(self, line_num, message):
+        self.failed += 1
+        self.stderr.write(f"line {line_num}: {message}")
+
+    def import_chunk(self, chunk, pool, dry_run):
+        rows = self.validate(chunk)
+        if not rows:
+            return
+
+        hashes = pool.map(make_password, [row.get('password') or None for _, row in rows], chunksize=32)
+        for (_, row), hashed in zip(rows, hashes):
+            row['password'] = hashed
+
+        try:
+            with transaction.atomic():
+                self.insert(rows)
+                if dry_run:
+                    transaction.set_rollback(True)
+            self.created += len(rows)
+        except DatabaseError:
+            # something slipped past validation (e.g. a concurrent signup); isolate it row by row
+            for line_num, row in rows:
+                try:
+                    with transaction.atomic():
+                        self.insert([(line_num, row)])
+                        if dry_run:
+                            transaction.set_rollback(True)
+                    self.created += 1
+                except DatabaseError as e:
+                    self.error(line_num, str(e))
+
+    def validate(self, chunk):
+        valid = []
+        for line_num, row in chunk:
+            if not isinstance(row, dict):
+                self.error(line_num, f"expected an object, got {type(row).__name__}")
+                continue
+            if '__error__' in row:
+                self.error(line_num, row['__error__'])
+                continue
+            not_text = [f for f in TEXT_FIELDS if row.get(f) is not None and not isinstance(row[f], str)]
+            if not_text:
+                self.error(line_num, f"{', '.join(not_text)} must be text")
+                continue
+            row = {key: (value.strip() if isinstance(value, str) else value) for key, value in row.items() if key}
+            row['email'] = (row.get('email') or '').lower()
+            row['role'] = row.get('role') or 'customer'
+            missing = [f for f in ('email', 'firstname', 'contact_number') if not row.get(f)]
+            if missing:
+                self.error(line_num, f"missing {', '.join(missing)}")
+                continue
+            if row['role'] not in ('customer', 'trainer'):
+                self.error(line_num, f"unknown role {row['role']!r}")
+                continue
+            too_long = [f"{field} (max {limit})" for field, limit in COLUMN_LIMITS[row['role']].items()
+                        if len(row.get(field) or '') > limit]
+            if too_long:
+                self.error(line_num, f"too long: {', '.join(too_long)}")
+                continue
+            try:
+                validate_email(row['email'])
+            except ValidationError:
+                self.error(line_num, f"invalid email {row['email']!r}")
+                continue
+            if row['role'] == 'trainer' and row.get('available') and row['available'] not in dict(Trainer.AVAILABILITY_CHOICES):
+                self.error(line_num, f"available must be one of {', '.join(dict(Trainer.AVAILABILITY_CHOICES))}")
+                continue
+            if row['role'] == 'trainer' and row.get('specialization') and row['specialization'] not in dict(Trainer.SPECIALIZATION_CHOICES):
+                self.error(line_num, f"unknown specialization {row['specialization']!r}")
+                continue
+            if row['role'] == 'trainer' and row.get('date_of_birth'):
+                try:
+                    row['date_of_birth'] = parse_date(row['date_of_birth'])
+                except ValueError:
+                    row['date_of_birth'] = None
+                if row['date_of_birth'] is None:
+                    self.error(line_num, "date_of_birth must be YYYY-MM-DD")
+                    continue
+            valid.append((line_num, row))
+
+        # one query per table for the whole chunk, plus duplicates within the chunk
+        emails = set(UserAccount.objects.filter(
+            email__in=[row['email'] for _, row in valid]).values_list('email', flat=True))
+        contacts = {
+            'customer': set(Customer.objects.filter(
+                contact_number__in=[row['contact_number'] for _, row in valid if row['role'] == 'customer']
+            ).values_list('contact_number', flat=True)),
+            'trainer': set(Trainer.objects.filter(
+                contact_number__in=[row['contact_number'] for _, row in valid if row['role'] == 'trainer']
+            ).values_list('contact_number', flat=True)),
+        }
+        rows = []
+        for line_num, row in valid:
+            if row['email'] in emails:
+                self.error(line_num, f"email {row['email']} already exists")
+                continue
+            if row['contact_number'] in contacts[row['role']]:
+                self.error(line_num, f"contact number {row['contact_number']} already taken")
+                continue
+            emails.add(row['email'])
+            contacts[row['role']].add(row['contact_number'])
+            rows.append((line_num, row))
+        return rows
+
+    def insert(self, rows):
+        users = UserAccount.objects.bulk_create([
+            UserAccount(
+                email=row['email'],
+                firstname=row['firstname'],
+                lastname=row.get('lastname', ''),
+                password=row['password'],
+                role=row['role'],
+            )
+            for _, row in rows
+        ])
+        Customer.objects.bulk_create([
+            Customer(user=user, contact_number=row['contact_number'])
+            for user, (_, row) in zip(users, rows) if row['role'] == 'customer'
+        ])
+        trainer_rows = [(user, row) for user, (_, row) in zip(users, rows) if row['role'] == 'trainer']
+        trainers = Trainer.fill_derived_fields([
+            Trainer(
+                user=user,
+                contact_number=row['contact_number'],
+                slug=row.get('slug', ''),
+                **{field: row[field] for field in TRAINER_FIELDS if row.get(field)},
+            )
+            for user, row in trainer_rows
+        ], taken=self.slugs)
+        # keep the slug if this chunk is rolled back and retried row by row
+        for trainer, (_, row) in zip(trainers, trainer_rows):
+            row['slug'] = trainer.slug
+        trainers = Trainer.objects.bulk_create(trainers)
+        TrainerProfile.objects.bulk_create([
+            TrainerProfile(trainer=trainer, **{field: row[field] for field in PROFILE_FIELDS if row.get(field)})
+            for trainer, (_, row) in zip(trainers, trainer_rows)
+        ])
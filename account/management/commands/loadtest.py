@@ -0,0 +1,239 @@
+import datetime
+import json
+import logging
+import random
+import statistics
+import subprocess
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from account.models import Customer, Trainer, Booking, CalendarToken
+from account.querylog import capture_queries
+from .seed_data import SEED_DOMAIN
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every API route in-process against the data from seed_data and report "
+        "p50/p95/p99 latency, throughput and queries per request for each endpoint. "
+        "Results are written as JSON so runs can be compared with --baseline. "
+        "Everything the run writes (bookings, sign-ups, tokens) is rolled back, and "
+        "rate limits are switched off for the run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help="Timed requests per endpoint")
+        parser.add_argument('--warmup', type=int, default=10, help="Untimed requests per endpoint")
+        parser.add_argument('--endpoint', action='append', help="Only run these endpoints (repeatable)")
+        parser.add_argument('--password', default='loadtest-pass', help="The seed_data --password")
+        parser.add_argument('--seed', type=int, default=1, help="Seed for picking users and payloads")
+        parser.add_argument('--output', default='loadtest.json', help="Where to write the JSON results")
+        parser.add_argument('--baseline', help="Earlier results to compare against")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.password = options['password']
+        customers = list(Customer.objects.filter(user__email__endswith=f'@{SEED_DOMAIN}')
+                         .select_related('user').order_by('pk')[:50])
+        trainers = list(Trainer.objects.filter(user__email__endswith=f'@{SEED_DOMAIN}')
+                        .select_related('user').order_by('pk')[:50])
+        if not customers or not trainers:
+            raise CommandError("No seeded data found; run `manage.py seed_data` first.")
+
+        scenarios = self.scenarios()
+        unknown = set(options['endpoint'] or ()) - set(scenarios)
+        if unknown:
+            raise CommandError(f"Unknown endpoint(s): {', '.join(sorted(unknown))}. "
+                               f"Choose from {', '.join(scenarios)}.")
+
+        self.client = Client(HTTP_HOST='localhost')
+        results = {}
+        # expected 4xx answers (e.g. 409 slot taken) would otherwise be logged per request
+        request_logger = logging.getLogger('django.request')
+        level = request_logger.level
+        request_logger.setLevel(logging.ERROR)
+        try:
+            # measure the endpoints, not the rate limits in front of them
+            with override_settings(THROTTLE_RATES=dict.fromkeys(settings.THROTTLE_RATES)):
+                self.run_all(scenarios, customers, trainers, results, options)
+        finally:
+            request_logger.setLevel(level)
+
+        report = {
+            'meta': {
+                'commit': git_commit(),
+                'finished_at': timezone.now().isoformat(),
+                'database': connection.vendor,
+                'requests': options['requests'],
+                'seeded': {
+                    'customers': Customer.objects.filter(user__email__endswith=f'@{SEED_DOMAIN}').count(),
+                    'trainers': Trainer.objects.filter(user__email__endswith=f'@{SEED_DOMAIN}').count(),
+                    'bookings': Booking.objects.filter(customer__user__email__endswith=f'@{SEED_DOMAIN}').count(),
+                },
+            },
+            'endpoints': results,
+        }
+        with open(options['output'], 'w') as out:
+            json.dump(report, out, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+        if options['baseline']:
+            self.compare(options['baseline'], report)
+
+    def run_all(self, scenarios, customers, trainers, results, options):
+        with transaction.atomic():
+            self.customers = [(c, Token.objects.get_or_create(user=c.user)[0].key) for c in customers]
+            self.trainers = [(t, Token.objects.get_or_create(user=t.user)[0].key) for t in trainers]
+            tokens = dict((c.pk, key) for c, key in self.customers)
+            self.meetings = [
+                (booking_id, tokens[customer_id])
+                for customer_id, booking_id in Booking.objects.filter(customer__in=customers)
+                .values_list('customer_id', 'id')[:500]
+            ]
+            self.feeds = [
+                CalendarToken.objects.get_or_create(user=c.user, defaults={'key': CalendarToken.generate_key()})[0].key
+                for c in customers[:10]
+            ]
+            for name, build in scenarios.items():
+                if options['endpoint'] and name not in options['endpoint']:
+                    continue
+                results[name] = self.run(build, options)
+                self.stdout.write(self.format_row(name, results[name]))
+            transaction.set_rollback(True)
+
+    def scenarios(self):
+        """Endpoint name -> callable returning (method, path, payload, token) for one request."""
+        today = timezone.localdate()
+
+        def customer():
+            return self.rng.choice(self.customers)
+
+        def trainer():
+            return self.rng.choice(self.trainers)
+
+        def meeting():
+            booking_id, token = self.rng.choice(self.meetings)
+            return 'get', reverse('booking-meeting', args=[booking_id]), None, token
+
+        def booking():
+            day = today + datetime.timedelta(days=self.rng.randint(1, 60))
+            return 'post', reverse('create-booking'), {
+                'trainer_id': trainer()[0].pk,
+                'session_type': 'virtual',
+                'date': day.isoformat(),
+                'time': datetime.time(self.rng.randint(6, 17)).strftime('%I:%M %p'),
+            }, customer()[1]
+
+        def register():
+            n = self.rng.getrandbits(40)
+            return 'post', reverse('customer-register'), {
+                'user': {'email': f'loadtest-{n}@example.com', 'firstname': 'Load', 'lastname': 'Test',
+                         'password': 'loadtest-pass'},
+                'contact_number': f'lt{n}',
+            }, None
+
+        return {
+            'trainer-list': lambda: ('get', reverse('trainer-list'), None, None),
+            'trainer-availability': lambda: ('get', reverse('trainer-availability'), {
+                'start': today.isoformat(), 'end': (today + datetime.timedelta(days=6)).isoformat()}, None),
+            'upcoming-sessions': lambda: ('get', reverse('upcoming-sessions'), None, customer()[1]),
+            'past-sessions': lambda: ('get', reverse('past-sessions'), None, customer()[1]),
+            'upcoming-trainer-sessions': lambda: ('get', reverse('upcoming-trainer-sessions'), None, trainer()[1]),
+            'past-trainer-sessions': lambda: ('get', reverse('past-trainer-sessions'), None, trainer()[1]),
+            'user-detail': lambda: ('get', reverse('user-detail'), None, customer()[1]),
+            'customer-detail': lambda: ('get', reverse('customer-detail'), None, customer()[1]),
+            'dashboard': lambda: ('get', reverse('dashboard'), None, customer()[1]),
+            'booking-meeting': meeting,
+            'signin': lambda: ('post', reverse('signin'), {
+                'email': customer()[0].user.email, 'password': self.password}, None),
+            'calendar-feed': lambda: ('get', reverse('calendar-feed', args=[self.rng.choice(self.feeds)]), None, None),
+            'create-booking': booking,
+            'customer-register': register,
+        }
+
+    def request(self, build):
+        method, path, payload, token = build()
+        headers = {'HTTP_AUTHORIZATION': f'Token {token}'} if token else {}
+        if method == 'get':
+            return self.client.get(path, payload, **headers)
+        return self.client.post(path, payload, content_type='application/json', **headers)
+
+    def run(self, build, options):
+        for _ in range(options['warmup']):
+            self.request(build)
+
+        times, statuses, sizes = [], Counter(), []
+        with capture_queries() as queries:
+            started = time.perf_counter()
+            for _ in range(options['requests']):
+                begin = time.perf_counter()
+                response = self.request(build)
+                # streamed bodies are produced while they are read, so time that too
+                body = b''.join(response.streaming_content) if response.streaming else response.content
+                times.append(time.perf_counter() - begin)
+                statuses[response.status_code] += 1
+                sizes.append(len(body))
+            elapsed = time.perf_counter() - started
+
+        cuts = statistics.quantiles(times, n=100, method='inclusive') if len(times) > 1 else times * 99
+        return {
+            'requests': len(times),
+            'throughput_rps': round(len(times) / elapsed, 1),
+            'latency_ms': {
+                'mean': round(statistics.fmean(times) * 1000, 3),
+                'p50': round(cuts[49] * 1000, 3),
+                'p95': round(cuts[94] * 1000, 3),
+                'p99': round(cuts[98] * 1000, 3),
+            },
+            'queries_per_request': round(len(queries) / len(times), 2),
+            'mean_response_bytes': round(statistics.fmean(sizes)),
+            'statuses': {str(code): count for code, count in sorted(statuses.items())},
+        }
+
+    def format_row(self, name, result):
+        latency = result['latency_ms']
+        statuses = ' '.join(f'{code}x{count}' for code, count in result['statuses'].items())
+        return (
+            f"{name:>26}: {result['throughput_rps']:8.1f} req/s  p50 {latency['p50']:7.2f}  "
+            f"p95 {latency['p95']:7.2f}  p99 {latency['p99']:7.2f} ms  "
+            f"{result['queries_per_request']:5.1f} q/req  [{statuses}]"
+        )
+
+    def compare(self, path, report):
+        with open(path) as handle:
+            baseline = json.load(handle)
+        self.stdout.write(f"\nCompared with {path} ({baseline['meta'].get('commit') or 'unknown commit'}):")
+        for name, result in report['endpoints'].items():
+            before = baseline['endpoints'].get(name)
+            if before is None:
+                continue
+            p95, old_p95 = result['latency_ms']['p95'], before['latency_ms']['p95']
+            rps, old_rps = result['throughput_rps'], before['throughput_rps']
+            self.stdout.write(
+                f"{name:>26}: p95 {old_p95:7.2f} -> {p95:7.2f} ms ({change(old_p95, p95)}), "
+                f"{old_rps:8.1f} -> {rps:8.1f} req/s ({change(old_rps, rps)})"
+            )
+
+
+def change(before, after):
+    if not before:
+        return 'n/a'
+    return f'{(after - before) / before * 100:+.1f}%'
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=settings.BASE_DIR,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
@@ -0,0 +1,152 @@
+import random
+import time
+import uuid
+from datetime import datetime, time as dtime, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.timezone import localdate, make_aware
+
+from account.directory import invalidate_trainer_directory
+from account.models import (
+    UserAccount, Customer, Trainer, TrainerProfile, WorkingHours, Booking,
+)
+
+SEED_DOMAIN = 'seed.example.com'
+
+FIRST_NAMES = [
+    'Ama', 'Kofi', 'Yaw', 'Akosua', 'Kwame', 'Esi', 'Kojo', 'Efua', 'Kwabena', 'Abena',
+    'Kwaku', 'Adwoa', 'Fiifi', 'Araba', 'Nana', 'Yaa', 'Ekow', 'Afua', 'Kweku', 'Akua',
+]
+LAST_NAMES = [
+    'Mensah', 'Boateng', 'Owusu', 'Asante', 'Agyei', 'Osei', 'Appiah', 'Darko', 'Addo', 'Amoah',
+    'Ofori', 'Quaye', 'Tetteh', 'Annan', 'Badu', 'Sarpong', 'Acheampong', 'Frimpong', 'Nkrumah', 'Bonsu',
+]
+TITLES = {'virtual': 'Virtual Session', 'in-person': 'In-person Session'}
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a deterministic synthetic dataset (customers, trainers with profiles and "
+        "working hours, and bookings) for load tests and benchmarks. Seeded accounts use "
+        f"@{SEED_DOMAIN} addresses and share one password; --flush removes earlier seeded data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--customers', type=int, default=2000)
+        parser.add_argument('--trainers', type=int, default=100)
+        parser.add_argument('--bookings', type=int, default=50_000)
+        parser.add_argument('--days-back', type=int, default=365, help="Spread past bookings over this many days")
+        parser.add_argument('--days-ahead', type=int, default=60, help="Spread upcoming bookings over this many days")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--password', default='loadtest-pass', help="Password of every seeded account")
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--flush', action='store_true', help="Delete previously seeded data first")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        rng = random.Random(options['seed'])
+        with transaction.atomic():
+            seeded = UserAccount.objects.filter(email__endswith=f'@{SEED_DOMAIN}')
+            if options['flush']:
+                deleted, _ = seeded.delete()
+                self.stdout.write(f"Removed {deleted} seeded rows")
+            elif seeded.exists():
+                raise CommandError("Seeded data already exists; pass --flush to replace it.")
+            customers = self.create_customers(rng, options)
+            trainers = self.create_trainers(rng, options)
+            bookings = self.create_bookings(rng, customers, trainers, options)
+        invalidate_trainer_directory()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(customers)} customers, {len(trainers)} trainers and {bookings} bookings "
+            f"in {time.perf_counter() - started:.1f}s (seed {options['seed']})"
+        ))
+
+    def people(self, rng, role, count, password, batch_size):
+        return UserAccount.objects.bulk_create([
+            UserAccount(
+                email=f'{role}{i}@{SEED_DOMAIN}',
+                firstname=rng.choice(FIRST_NAMES),
+                lastname=rng.choice(LAST_NAMES),
+                role=role,
+                password=password,
+            )
+            for i in range(count)
+        ], batch_size=batch_size)
+
+    def create_customers(self, rng, options):
+        # hash once: every seeded account can sign in with --password
+        users = self.people(rng, 'customer', options['customers'], make_password(options['password']), options['batch_size'])
+        return Customer.objects.bulk_create([
+            Customer(user=user, contact_number=f'+23320{i:07d}') for i, user in enumerate(users)
+        ], batch_size=options['batch_size'])
+
+    def create_trainers(self, rng, options):
+        users = self.people(rng, 'trainer', options['trainers'], make_password(options['password']), options['batch_size'])
+        specializations = [value for value, _ in Trainer.SPECIALIZATION_CHOICES]
+        trainers = Trainer.objects.bulk_create(Trainer.fill_derived_fields([
+            Trainer(
+                user=user,
+                contact_number=f'+23324{i:07d}',
+                specialization=rng.choice(specializations),
+                address=f'{rng.randint(1, 200)} {rng.choice(LAST_NAMES)} Street, Accra',
+                available='no' if rng.random() < 0.1 else 'yes',
+                date_of_birth=localdate() - timedelta(days=rng.randint(22 * 365, 55 * 365)),
+            )
+            for i, user in enumerate(users)
+        ]), batch_size=options['batch_size'])
+
+        TrainerProfile.objects.bulk_create([
+            TrainerProfile(
+                trainer=trainer,
+                instagram=f'https://instagram.com/{trainer.slug}' if rng.random() < 0.7 else None,
+                twitter=f'https://twitter.com/{trainer.slug}' if rng.random() < 0.4 else None,
+                bio=f'{trainer.get_specialization_display()} coach.',
+            )
+            for trainer in trainers
+        ], batch_size=options['batch_size'])
+
+        hours = []
+        for trainer in trainers:
+            # most trainers work weekdays; some keep weekend hours too
+            start = rng.choice([5, 6, 7, 8])
+            days = range(7) if rng.random() < 0.3 else range(5)
+            hours += [
+                WorkingHours(trainer=trainer, weekday=day, start_time=dtime(start), end_time=dtime(start + 10))
+                for day in days
+            ]
+        WorkingHours.objects.bulk_create(hours, batch_size=options['batch_size'])
+        return trainers
+
+    def create_bookings(self, rng, customers, trainers, options):
+        if not customers or not trainers:
+            return 0
+        today = localdate()
+        span = options['days_back'] + options['days_ahead']
+        taken = set()
+        batch, created = [], 0
+        for _ in range(options['bookings']):
+            trainer = rng.choice(trainers)
+            day = today + timedelta(days=rng.randrange(span) - options['days_back'])
+            start = make_aware(datetime.combine(day, dtime(rng.randint(6, 17))))
+            if (trainer.pk, start) in taken:
+                continue  # the trainer is already booked for that hour
+            taken.add((trainer.pk, start))
+            session_type = rng.choice(list(TITLES))
+            batch.append(Booking(
+                customer=rng.choice(customers),
+                trainer=trainer,
+                title=TITLES[session_type],
+                session_type=session_type,
+                start_time=start,
+                session_started=day < today,
+                meeting_id=str(uuid.UUID(int=rng.getrandbits(128))),
+            ))
+            if len(batch) >= options['batch_size']:
+                created += len(Booking.objects.bulk_create(batch))
+                batch = []
+        if batch:
+            created += len(Booking.objects.bulk_create(batch))
+        return created
@@ -0,0 +1,194 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus sense. Not thread-safe on its own."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # the last slot is +Inf
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def samples(self):
+        running = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            running += count
+            yield bound, running
+
+
+class RequestStats:
+    __slots__ = ('queries', 'db_time')
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+
+
+class MetricsRegistry:
+    """
+    Per-process request metrics, keyed by (route, method).
+
+    Each gunicorn/uvicorn worker keeps its own registry, so a scrape of
+    /api/metrics reports the worker that answered it.
+    """
+
+    METRICS = (
+        ('http_request_duration_seconds', 'Time spent handling the request.', LATENCY_BUCKETS),
+        ('http_request_db_queries', 'Database queries run by the request.', QUERY_BUCKETS),
+        ('http_request_db_duration_seconds', 'Time spent in database queries.', LATENCY_BUCKETS),
+        ('http_response_size_bytes', 'Size of non-streaming response bodies.', SIZE_BUCKETS),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {}
+        self._responses = {}
+
+    def record(self, route, method, status, duration, stats, size):
+        key = (route, method)
+        with self._lock:
+            histograms = self._histograms.get(key)
+            if histograms is None:
+                histograms = self._histograms[key] = [Histogram(buckets) for _, _, buckets in self.METRICS]
+            histograms[0].observe(duration)
+            histograms[1].observe(stats.queries)
+            histograms[2].observe(stats.db_time)
+            if size is not None:
+                histograms[3].observe(size)
+            status_key = (route, method, f'{status // 100}xx')
+            self._responses[status_key] = self._responses.get(status_key, 0) + 1
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+            self._responses.clear()
+
+    def render(self):
+        """The registry in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = {key: [self._snapshot(h) for h in value] for key, value in self._histograms.items()}
+            responses = dict(self._responses)
+
+        lines = [
+            '# HELP http_responses_total Responses sent, by status class.',
+            '# TYPE http_responses_total counter',
+        ]
+        for (route, method, status), count in sorted(responses.items()):
+            lines.append(f'http_responses_total{{{labels(route, method)},status="{status}"}} {count}')
+
+        for index, (name, help_text, _) in enumerate(self.METRICS):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} histogram']
+            for (route, method), snapshots in sorted(histograms.items()):
+                samples, total, count = snapshots[index]
+                base = labels(route, method)
+                for bound, running in samples:
+                    lines.append(f'{name}_bucket{{{base},le="{bound}"}} {running}')
+                lines.append(f'{name}_sum{{{base}}} {total:g}')
+                lines.append(f'{name}_count{{{base}}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _snapshot(histogram):
+        return list(histogram.samples()), histogram.sum, histogram.count
+
+
+def labels(route, method):
+    route = route.replace('\\', '\\\\').replace('"', '\\"')
+    return f'route="{route}",method="{method}"'
+
+
+registry = MetricsRegistry()
+
+_current = ContextVar('request_metrics', default=None)
+
+
+def count_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def instrument(connection):
+    # insert at the bottom: connection.execute_wrapper() pops from the top,
+    # so appending while one of those is active would pop ours instead
+    if count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, count_query)
+
+
+def instrument_new_connection(sender, connection, **kwargs):
+    instrument(connection)
+
+
+class MetricsMiddleware:
+    """
+    Records latency, query count, database time and response size per route.
+
+    Queries are attributed through a context variable, which follows the
+    request into sync_to_async threads, so async views are counted too. Routes
+    are labelled by their URL pattern (never the raw path) to keep the number
+    of series bounded; unmatched requests share one label.
+    """
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        connection_created.connect(instrument_new_connection)
+        for connection in connections.all(initialized_only=True):
+            instrument(connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        self.record(request, response, time.perf_counter() - started, stats)
+        return response
+
+    def record(self, request, response, duration, stats):
+        match = getattr(request, 'resolver_match', None)
+        route = f'/{match.route}' if match is not None and match.route else 'unmatched'
+        size = None if response.streaming else len(response.content)
+        registry.record(route, request.method, response.status_code, duration, stats, size)
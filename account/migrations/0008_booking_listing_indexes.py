@@ -0,0 +1,32 @@
+# Generated by Django 5.2.4 on 2026-10-17 12:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0007_remove_customer_avatar_useraccount_avatar'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['customer', 'start_time', 'id'], name='booking_customer_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['trainer', 'start_time', 'id'], name='booking_trainer_start_idx'),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='customer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='bookings', to='account.customer'),
+        ),
+        migrations.AlterField(
+            model_name='booking',
+            name='trainer',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='sessions', to='account.trainer'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-17 12:23
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def check_duplicate_slots(apps, schema_editor):
+    # The constraint can't be added while a trainer has two bookings at the same start time, and
+    # which one to keep is for the people involved to decide, so stop and list them instead.
+    Booking = apps.get_model('account', 'Booking')
+    slots = (Booking.objects.values_list('trainer_id', 'start_time')
+             .annotate(count=Count('id')).filter(count__gt=1).order_by('trainer_id', 'start_time'))
+    duplicates = []
+    for trainer_id, start_time, _ in slots:
+        ids = Booking.objects.filter(trainer_id=trainer_id, start_time=start_time).order_by('id').values_list('id', flat=True)
+        duplicates.append(f"trainer {trainer_id} at {start_time.isoformat()}: bookings {', '.join(map(str, ids))}")
+    if duplicates:
+        raise ValueError(
+            "Cannot add booking_unique_trainer_slot while trainers are double-booked; move or delete "
+            "all but one booking of each slot and migrate again:\n  " + "\n  ".join(duplicates)
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0009_workinghours'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_slots, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.UniqueConstraint(fields=('trainer', 'start_time'), name='booking_unique_trainer_slot'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.4 on 2026-10-17 13:05
+
+from django.db import migrations, models
+from django.utils.text import slugify
+
+
+def populate_slug_and_search_name(apps, schema_editor):
+    Trainer = apps.get_model('account', 'Trainer')
+    taken = set()
+    for trainer in Trainer.objects.select_related('user').order_by('id'):
+        name = f"{trainer.user.firstname} {trainer.user.lastname}"
+        base = slugify(name) or 'trainer'
+        slug, n = base, 1
+        while slug in taken:
+            n += 1
+            slug = f'{base}-{n}'
+        taken.add(slug)
+        trainer.slug = slug
+        trainer.search_name = " ".join(name.split()).casefold()
+        trainer.save(update_fields=['slug', 'search_name'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0010_booking_unique_trainer_slot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trainer',
+            name='slug',
+            field=models.SlugField(max_length=255, null=True),
+        ),
+        migrations.AddField(
+            model_name='trainer',
+            name='search_name',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=511),
+            preserve_default=False,
+        ),
+        migrations.RunPython(populate_slug_and_search_name, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='trainer',
+            name='slug',
+            field=models.SlugField(max_length=255, unique=True),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.4 on 2026-10-17 12:31
+
+import account.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0011_trainer_slug_search_name'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='trainerprofile',
+            name='avatar',
+            field=models.ImageField(storage=account.storage.get_avatar_storage, upload_to='avatars/'),
+        ),
+        migrations.AlterField(
+            model_name='useraccount',
+            name='avatar',
+            field=models.ImageField(blank=True, null=True, storage=account.storage.get_avatar_storage, upload_to='avatars/'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4 on 2026-10-17 13:40
+
+from django.db import migrations
+from django.db.models.functions import Lower, Trim
+
+
+def lowercase_emails(apps, schema_editor):
+    # EmailAuthBackend matches the lowercased email exactly, so stored emails must be lowercase.
+    # Accounts whose emails differ only in case can't both keep theirs; rather than guess which
+    # one is real, stop and list them so they can be merged or renamed by hand first.
+    UserAccount = apps.get_model('account', 'UserAccount')
+    mixed = dict(UserAccount.objects.exclude(email=Lower(Trim('email'))).values_list('id', 'email'))
+    normalized = {pk: email.strip().lower() for pk, email in mixed.items()}
+    owners = dict(UserAccount.objects.filter(email__in=normalized.values()).values_list('email', 'id'))
+    collisions = []
+    for pk, email in normalized.items():
+        if email in owners:
+            collisions.append(f"account {pk} ({mixed[pk]!r}) lowercases to {email!r}, used by account {owners[email]}")
+        else:
+            owners[email] = pk
+    if collisions:
+        raise ValueError(
+            "Cannot lowercase emails that would collide; give one account of each pair another "
+            "email (or merge them) and migrate again:\n  " + "\n  ".join(collisions)
+        )
+    for pk, email in normalized.items():
+        UserAccount.objects.filter(pk=pk).update(email=email)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0015_booking_updated_at_calendartoken'),
+    ]
+
+    operations = [
+        migrations.RunPython(lowercase_emails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.4 on 2026-10-17 14:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0016_lowercase_emails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useraccount',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,7 +1,21 @@
 from django.db import models
 from django.contrib.auth.models import User, AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.utils import timezone
+from django.utils.text import slugify
+import secrets
 import uuid
+from .storage import get_avatar_storage
+
+
+def normalize_name(name):
+    """Case- and whitespace-insensitive form of a person's name, used for lookups."""
+    return " ".join(name.split()).casefold()
+
+
+def normalize_email(email):
+    """The stored form of an email address: trimmed and lowercased, so lookups can match exactly."""
+    return email.strip().lower()
+
 class UserAccountManager(BaseUserManager):
     def create_user(self, email, firstname, lastname, password=None, role=None):
         if not email:
@@ -51,10 +65,14 @@ class UserAccount(AbstractBaseUser, PermissionsMixin):
     email = models.EmailField(max_length=255, unique=True)
     password = models.CharField(max_length=255)
     role = models.CharField(max_length=50, choices=ROLE_CHOICES, default='customer')
-    avatar = models.ImageField(upload_to='avatars/', null=True, blank=True)
+    avatar = models.ImageField(upload_to='avatars/', storage=get_avatar_storage, null=True, blank=True)
+    # URLs of the stored avatar and its thumbnails, keyed by "original" and pixel size
+    avatar_variants = models.JSONField(default=dict, blank=True)
     
     is_active = models.BooleanField(default=True)
     is_staff = models.BooleanField(default=False)
+    # renames must show up in the other participant's calendar feed ETag
+    updated_at = models.DateTimeField(auto_now=True)
 
     objects = UserAccountManager()
 
@@ -115,6 +133,9 @@ class Trainer(models.Model):
     contact_number = models.CharField(unique=True, max_length=20)
     address = models.CharField(max_length=255)
     available = models.CharField(choices=AVAILABILITY_CHOICES, default="yes", blank=True, max_length=20)
+    slug = models.SlugField(max_length=255, unique=True)
+    # normalized "firstname lastname", kept in sync by save() and the UserAccount signal
+    search_name = models.CharField(max_length=511, db_index=True, editable=False)
     # appointments = models.ManyToManyField('training.Appointment', related_name='appointments', blank=True)
     created_at = models.DateTimeField(default=timezone.now)
 
@@ -130,10 +151,60 @@ class Trainer(models.Model):
 
     def __str__(self):
         return f"{self.user.firstname} {self.user.lastname} - {self.specialization}"
+
+    def save(self, *args, **kwargs):
+        self.search_name = normalize_name(self.user.fullname())
+        if not self.slug:
+            self.slug = self.unique_slug(self.user.fullname())
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def unique_slug(cls, name):
+        return cls.unique_slugs([name])[0]
+
+    @classmethod
+    def unique_slugs(cls, names, taken=None):
+        """
+        A free slug for each name, distinct from each other and from the saved
+        ones. Slugs already handed out but not saved yet can be passed in
+        ``taken``; the new ones are added to it.
+        """
+        taken = set() if taken is None else taken
+        bases = [slugify(name) or 'trainer' for name in names]
+        distinct = sorted(set(bases))
+        # a few hundred prefixes per query keeps SQLite under its expression depth limit
+        for i in range(0, len(distinct), 500):
+            prefixes = models.Q()
+            for base in distinct[i:i + 500]:
+                prefixes |= models.Q(slug__startswith=base)
+            taken.update(cls.objects.filter(prefixes).values_list('slug', flat=True))
+        slugs = []
+        for base in bases:
+            slug, n = base, 1
+            while slug in taken:
+                n += 1
+                slug = f'{base}-{n}'
+            taken.add(slug)
+            slugs.append(slug)
+        return slugs
+
+    @classmethod
+    def fill_derived_fields(cls, trainers, taken=None):
+        """
+        Set search_name, and a slug where there isn't one, on trainers about to
+        be bulk_create()d, which skips save().
+        """
+        missing = [trainer for trainer in trainers if not trainer.slug]
+        for trainer, slug in zip(missing, cls.unique_slugs([t.user.fullname() for t in missing], taken)):
+            trainer.slug = slug
+        for trainer in trainers:
+            trainer.search_name = normalize_name(trainer.user.fullname())
+        return trainers
     
 class TrainerProfile(models.Model):
     trainer = models.OneToOneField('Trainer', on_delete=models.CASCADE, related_name='profile')
-    avatar = models.ImageField(upload_to='avatars/')
+    avatar = models.ImageField(upload_to='avatars/', storage=get_avatar_storage)
+    avatar_variants = models.JSONField(default=dict, blank=True)
     instagram = models.URLField(blank=True, null=True)
     facebook = models.URLField(blank=True, null=True)
     twitter = models.URLField(blank=True, null=True)
@@ -151,21 +222,113 @@ class TrainerProfile(models.Model):
 
 
 
+class WorkingHours(models.Model):
+    WEEKDAY_CHOICES = (
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    )
+
+    trainer = models.ForeignKey(Trainer, related_name='working_hours', on_delete=models.CASCADE)
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    slot_minutes = models.PositiveSmallIntegerField(default=60)
+
+    class Meta:
+        db_table = 'trainer_working_hours'
+        verbose_name_plural = 'Working hours'
+        ordering = ['weekday', 'start_time']
+
+    def __str__(self):
+        return f"{self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M}"
+
+
+class BookingQuerySet(models.QuerySet):
+    def with_participants(self):
+        """Join trainer and customer names so listing rows need no extra queries."""
+        return self.select_related('trainer__user', 'customer__user').only(
+            'id', 'title', 'session_type', 'start_time', 'session_started', 'meeting_id',
+            'trainer__user__firstname', 'trainer__user__lastname',
+            'customer__user__firstname', 'customer__user__lastname',
+        )
+
+
 class Booking(models.Model):
     AVAILABLE_CHOICES = (
         ('virtual', 'VIRTUAL'),
         ('in-person', 'IN-PERSON')
        
     )
-    customer = models.ForeignKey(Customer, related_name="bookings", on_delete=models.CASCADE)
-    trainer = models.ForeignKey(Trainer, related_name="sessions", on_delete=models.CASCADE)
+    # the composite indexes below lead with these columns, so the FKs don't need their own
+    customer = models.ForeignKey(Customer, related_name="bookings", on_delete=models.CASCADE, db_index=False)
+    trainer = models.ForeignKey(Trainer, related_name="sessions", on_delete=models.CASCADE, db_index=False)
     title = models.CharField(max_length=255)
     session_type = models.CharField(choices=AVAILABLE_CHOICES, blank=True, max_length=20)
     start_time = models.DateTimeField()
     session_started = models.BooleanField(default=False)
     meeting_id = models.CharField(max_length=255, unique=True, blank=True)
+    # drives the calendar feed's ETag/Last-Modified; QuerySet.update() must set it explicitly
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = BookingQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # listings filter on one participant and walk (start_time, id)
+            models.Index(fields=['customer', 'start_time', 'id'], name='booking_customer_start_idx'),
+            models.Index(fields=['trainer', 'start_time', 'id'], name='booking_trainer_start_idx'),
+        ]
+        constraints = [
+            # one session per trainer per slot, enforced by the database
+            models.UniqueConstraint(fields=['trainer', 'start_time'], name='booking_unique_trainer_slot'),
+        ]
 
     def save(self, *args, **kwargs):
         if not self.meeting_id:
             self.meeting_id = str(uuid.uuid4())  # unique Jitsi room name
         super().save(*args, **kwargs)
+
+    @property
+    def meeting_url(self):
+        return f"https://meet.jit.si/winnyfit_{self.meeting_id}"
+
+
+class CalendarToken(models.Model):
+    """The secret in a user's calendar feed URL; rotating it revokes old subscriptions."""
+    user = models.OneToOneField(UserAccount, on_delete=models.CASCADE, related_name='calendar_token')
+    key = models.CharField(max_length=64, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'calendar_token'
+
+    def __str__(self):
+        return f"Calendar feed of {self.user}"
+
+    @staticmethod
+    def generate_key():
+        return secrets.token_urlsafe(32)
+
+
+class StoredFile(models.Model):
+    """A content-addressed media object and how many fields point at it (see account.storage)."""
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64, unique=True)
+    size = models.PositiveBigIntegerField()
+    url = models.CharField(max_length=500, db_index=True)
+    refcount = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'stored_file'
+        indexes = [
+            models.Index(fields=['refcount', 'updated_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
@@ -0,0 +1,136 @@
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class BookingCursorPagination(BasePagination):
+    """
+    Keyset pagination over (start_time, id).
+
+    Each page is a single range query seeded from the last row of the previous
+    page, so deep pages cost the same as the first one. Cursors are opaque
+    base64 tokens; a "reverse" cursor walks back towards the previous page.
+    Page sizes come from settings.BOOKING_PAGE_SIZE and BOOKING_MAX_PAGE_SIZE.
+    """
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    descending = False
+    invalid_cursor_message = 'Invalid cursor'
+
+    def __init__(self, descending=None):
+        if descending is not None:
+            self.descending = descending
+
+    def paginate_queryset(self, queryset, request, view=None):
+        cursor = self.start_page(request)
+        return self.finish_page(list(self.page_queryset(queryset, cursor)), cursor)
+
+    async def apaginate_queryset(self, queryset, request):
+        """paginate_queryset for async views: the page is fetched with the async ORM."""
+        cursor = self.start_page(request)
+        return self.finish_page([row async for row in self.page_queryset(queryset, cursor)], cursor)
+
+    def start_page(self, request):
+        self.request = request
+        self.size = self.get_page_size(request)
+        return self.decode_cursor(request)
+
+    def page_queryset(self, queryset, cursor):
+        # one extra row tells us whether there is another page
+        return self.keyset_queryset(queryset, cursor)[:self.size + 1]
+
+    def finish_page(self, rows, cursor):
+        reverse = cursor is not None and cursor[2]
+        has_more = len(rows) > self.size
+        rows = rows[:self.size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.rows = rows
+        return rows
+
+    def keyset_queryset(self, queryset, cursor):
+        """Order the queryset and seek past the cursor position, if any."""
+        reverse = False
+        if cursor is not None:
+            start_time, pk, reverse = cursor
+            # walking backwards flips the comparison for this page
+            op = 'gt' if self.descending == reverse else 'lt'
+            # the inclusive bound is a range the (participant, start_time, id) index can
+            # seek to; the OR alone is planned as a multi-index OR plus a sort
+            queryset = queryset.filter(
+                Q(**{f'start_time__{op}e': start_time}),
+                Q(**{f'start_time__{op}': start_time}) | Q(start_time=start_time, **{f'id__{op}': pk}),
+            )
+
+        if self.descending != reverse:
+            return queryset.order_by('-start_time', '-id')
+        return queryset.order_by('start_time', 'id')
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_data(self, data):
+        return {
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        }
+
+    def get_page_size(self, request):
+        # read per request, so override_settings() and settings changes apply
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return settings.BOOKING_PAGE_SIZE
+        if size <= 0:
+            return settings.BOOKING_PAGE_SIZE
+        return min(size, settings.BOOKING_MAX_PAGE_SIZE)
+
+    def get_next_link(self):
+        if not (self.has_next and self.rows):
+            return None
+        return self.build_link(self.rows[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.rows:
+            # past the end of the data: step back to the first page
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.build_link(self.rows[0], reverse=True)
+
+    def build_link(self, row, reverse):
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(row, reverse))
+
+    def encode_cursor(self, row, reverse):
+        payload = json.dumps([row.start_time.isoformat(), row.id, int(reverse)], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            padded = encoded + '=' * (-len(encoded) % 4)
+            start_time, pk, reverse = json.loads(base64.urlsafe_b64decode(padded.encode()))
+            start_time = parse_datetime(start_time)
+            pk = int(pk)
+        except (TypeError, ValueError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+        if start_time is None:
+            raise NotFound(self.invalid_cursor_message)
+        return start_time, pk, bool(reverse)
@@ -0,0 +1,44 @@
+from django.core.exceptions import ObjectDoesNotExist
+from rest_framework.permissions import IsAuthenticated
+
+
+def get_profile(user, related_name):
+    """Return the user's role profile, or None. Free when the auth query joined it in."""
+    try:
+        return getattr(user, related_name)
+    except (ObjectDoesNotExist, AttributeError):
+        return None
+
+
+class IsCustomer(IsAuthenticated):
+    """Authenticated users with a customer profile; exposes it as request.customer."""
+    message = "Customer profile not found"
+
+    def has_permission(self, request, view):
+        if not super().has_permission(request, view):
+            return False
+        request.customer = get_profile(request.user, 'customer_profile')
+        return request.customer is not None
+
+
+class IsTrainer(IsAuthenticated):
+    """Authenticated users with a trainer profile; exposes it as request.trainer."""
+    message = "Trainer profile not found"
+
+    def has_permission(self, request, view):
+        if not super().has_permission(request, view):
+            return False
+        request.trainer = get_profile(request.user, 'staff_profile')
+        return request.trainer is not None
+
+
+class IsCustomerOrTrainer(IsAuthenticated):
+    """Authenticated users with either role profile; sets both request.customer and request.trainer."""
+    message = "Customer or trainer profile not found"
+
+    def has_permission(self, request, view):
+        if not super().has_permission(request, view):
+            return False
+        request.customer = get_profile(request.user, 'customer_profile')
+        request.trainer = get_profile(request.user, 'staff_profile')
+        return request.customer is not None or request.trainer is not None
@@ -0,0 +1,45 @@
+from contextlib import contextmanager
+
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# atomic() inside an outer transaction (a test, a rolled-back benchmark) turns into
+# these; they are not round trips the same code makes in production
+SAVEPOINT_STATEMENTS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+class QueryLog:
+    """The statements run inside capture_queries(); len() counts them, savepoints aside."""
+
+    def __init__(self):
+        self.statements = []
+        self.savepoints = 0
+
+    def __len__(self):
+        return len(self.statements)
+
+    def sql(self):
+        """Each statement with its parameters filled in, for reading rather than running."""
+        return [sql % tuple(repr(p) for p in params) if params and not many else sql
+                for sql, params, many in self.statements]
+
+
+@contextmanager
+def capture_queries(using=DEFAULT_DB_ALIAS):
+    """
+    Record the queries run on a connection inside the block. Benchmarks and
+    tests drive views through the test client, whose request_started signal
+    resets connection.queries, so this counts through an execute wrapper.
+    Parameters are kept as passed and only rendered by QueryLog.sql(), so
+    timing loops pay for an append per query.
+    """
+    log = QueryLog()
+
+    def capture(execute, sql, params, many, context):
+        if sql.startswith(SAVEPOINT_STATEMENTS):
+            log.savepoints += 1
+        else:
+            log.statements.append((sql, params, many))
+        return execute(sql, params, many, context)
+
+    with connections[using].execute_wrapper(capture):
+        yield log
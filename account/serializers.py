@@ -1,66 +1,165 @@
+from datetime import timedelta
+from django.contrib.auth.hashers import make_password
 from django.db import transaction, IntegrityError
+from django.db.models import Q
+from django.utils.timezone import now
 from rest_framework import serializers
-from .models import UserAccount, Trainer, TrainerProfile, Customer
+from .models import UserAccount, Trainer, TrainerProfile, Customer, Booking, normalize_email
+from .avatars import queue_avatar
+
+
+def unique_message(model, field_name):
+    """The message DRF's UniqueValidator would give for this model field."""
+    field = model._meta.get_field(field_name)
+    return field.error_messages['unique'] % {
+        'model_name': model._meta.verbose_name, 'field_label': field.verbose_name,
+    }
+
+
+def violated_field(error, model, field_names):
+    """
+    Which of model's unique field_names an IntegrityError is about, going by
+    the constraint the database names: PostgreSQL reports it by name
+    (<table>_<column>_key or ..._uniq), SQLite as "<table>.<column>".
+    Returns None for any other violation.
+    """
+    constraint = getattr(getattr(error.__cause__, 'diag', None), 'constraint_name', None)
+    table = model._meta.db_table
+    for name in field_names:
+        column = model._meta.get_field(name).column
+        if constraint is not None:
+            if constraint.startswith(f'{table}_{column}_'):
+                return name
+        elif f'{table}.{column}' in str(error):
+            return name
+    return None
+
+
+def taken_fields(email, contact_number, profile):
+    """
+    Which of email and contact_number are already registered, checked together
+    in one query. profile is the role relation that owns contact_number
+    ('customer_profile' or 'staff_profile'). Returns a subset of
+    {'email', 'contact_number'}.
+    """
+    number_lookup = f'{profile}__contact_number'
+    taken = set()
+    rows = UserAccount.objects.filter(
+        Q(email=email) | Q(**{number_lookup: contact_number})
+    ).values_list('email', number_lookup)
+    for row_email, row_number in rows:
+        if row_email == email:
+            taken.add('email')
+        if contact_number and row_number == contact_number:
+            taken.add('contact_number')
+    return taken
 
 
 # ---------- simple serializers used for representation ----------
-class TrainerProfileSerializer(serializers.ModelSerializer):
+class AvatarVariantsMixin:
+    """
+    Serves avatar URLs from the stored avatar_variants map (see account.avatars),
+    so representing a user or profile never calls the storage backend.
+    """
+
+    def absolute_url(self, url):
+        request = self.context.get('request', None)
+        if request is not None:
+            return request.build_absolute_uri(url)
+        return url  # fallback to relative if no request
+
+    def get_avatar(self, obj):
+        if obj.avatar_variants:
+            return self.absolute_url(obj.avatar_variants['original'])
+        # avatars stored before variants existed
+        if obj.avatar:
+            try:
+                return self.absolute_url(obj.avatar.url)
+            except Exception:
+                return None
+        return None
+
+    def get_avatars(self, obj):
+        return {size: self.absolute_url(url) for size, url in obj.avatar_variants.items()}
+
+
+class TrainerProfileSerializer(AvatarVariantsMixin, serializers.ModelSerializer):
+    avatar = serializers.SerializerMethodField()
+    avatars = serializers.SerializerMethodField()
+
     class Meta:
         model = TrainerProfile
-        fields = ['avatar', 'instagram', 'facebook', 'twitter', 'linkedin', 'website', 'bio']
+        fields = ['avatar', 'avatars', 'instagram', 'facebook', 'twitter', 'linkedin', 'website', 'bio']
 
 
-class UserAccountSerializer(serializers.ModelSerializer):
+class UserAccountSerializer(AvatarVariantsMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True)
     avatar = serializers.SerializerMethodField()
+    avatars = serializers.SerializerMethodField()
     class Meta:
         model = UserAccount
-        fields = ['id', 'firstname', 'lastname', 'password', 'email', 'role', 'avatar', 'is_active', 'is_staff']
-        
+        fields = ['id', 'firstname', 'lastname', 'password', 'email', 'role', 'avatar', 'avatars', 'is_active', 'is_staff']
+
+    def validate_email(self, value):
+        # stored lowercased: EmailAuthBackend looks users up by the normalized email
+        return normalize_email(value)
+
     def create(self, validated_data):
         password = validated_data.pop('password')
         user = UserAccount(**validated_data)
         user.set_password(password)  # hash password before saving
         user.save()
         return user
-    
-    # def get_avatar(self, obj):
-    #     if obj.avatar:
-    #         request = self.context.get('request')
-    #         if request is not None:
-    #             return request.build_absolute_uri(obj.avatar.url)
-    #         return obj.avatar.url
-    #     return None
 
-    def get_avatar(self, obj):
-        if obj.avatar:
-            try:
-                request = self.context.get('request', None)
-                url = obj.avatar.url
-                if request is not None:
-                    return request.build_absolute_uri(url)
-                return url  # fallback to relative if no request
-            except Exception:
-                return None
-        return None
 
 
+class UserAccountCreateSerializer(UserAccountSerializer):
+    """The nested user of a registration; its email is checked by the parent's validate()."""
+
+    class Meta(UserAccountSerializer.Meta):
+        extra_kwargs = {'email': {'validators': []}}
+
 
 class CustomerCreateSerializer(serializers.ModelSerializer):
-    user = UserAccountSerializer()
+    user = UserAccountCreateSerializer()
 
     class Meta:
         model = Customer
         fields = ['user', 'contact_number']
+        # checked together with the email in validate()
+        extra_kwargs = {'contact_number': {'validators': []}}
+
+    def validate(self, attrs):
+        taken = taken_fields(attrs['user']['email'], attrs['contact_number'], 'customer_profile')
+        if taken:
+            raise serializers.ValidationError(self.taken_errors(taken))
+        return attrs
+
+    def taken_errors(self, taken):
+        errors = {}
+        if 'email' in taken:
+            errors['user'] = {'email': [unique_message(UserAccount, 'email')]}
+        if 'contact_number' in taken:
+            errors['contact_number'] = [unique_message(Customer, 'contact_number')]
+        return errors
 
     def create(self, validated_data):
+        # the nested user data was validated with the rest; save it as is
         user_data = validated_data.pop('user')
-        
-        user_serializer = UserAccountSerializer(data=user_data)
-        user_serializer.is_valid(raise_exception=True)
-        user = user_serializer.save()  # this ensures password is hashed
-        
-        customer = Customer.objects.create(user=user, **validated_data)
+        password = user_data.pop('password')
+
+        with transaction.atomic():
+            user = UserAccount(**user_data)
+            user.set_password(password)  # hash password before saving
+            # validate() checked uniqueness, but a concurrent signup can still win the race
+            try:
+                user.save()
+            except IntegrityError:
+                raise serializers.ValidationError(self.taken_errors({'email'}))
+            try:
+                customer = Customer.objects.create(user=user, **validated_data)
+            except IntegrityError:
+                raise serializers.ValidationError(self.taken_errors({'contact_number'}))
         return customer
 
 
@@ -96,6 +195,8 @@ class TrainerCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Trainer
         fields = ['specialization', 'date_of_birth', 'contact_number', 'address', 'available', 'profile']
+        # TrainerRegistrationSerializer.validate checks uniqueness with the email
+        extra_kwargs = {'contact_number': {'validators': []}}
 
 
 # ---------- registration serializer that ties everything together ----------
@@ -122,6 +223,8 @@ class TrainerRegistrationSerializer(serializers.ModelSerializer):
     }
     """
     trainer = TrainerCreateSerializer(write_only=True)
+    # tries at picking a free slug when same-named trainers register at once
+    slug_attempts = 3
     # Return a full trainer representation after creation
     trainer_details = serializers.SerializerMethodField(read_only=True)
 
@@ -130,11 +233,13 @@ class TrainerRegistrationSerializer(serializers.ModelSerializer):
         fields = ['id', 'firstname', 'lastname', 'email', 'password', 'trainer', 'trainer_details']
         extra_kwargs = {
             'password': {'write_only': True},
-            'email': {'required': True}
+            # uniqueness is checked by validate(), together with the contact number
+            'email': {'required': True, 'validators': []}
         }
 
     def get_trainer_details(self, obj):
-        # obj is the created user; fetch trainer via related_name 'staff_profile'
+        # after create() the trainer and its profile are cached on the user, so this
+        # builds from memory; for other users it reads them via related_name 'staff_profile'
         try:
             trainer = obj.staff_profile
             return TrainerSerializer(trainer, context=self.context).data
@@ -142,43 +247,68 @@ class TrainerRegistrationSerializer(serializers.ModelSerializer):
             return None
 
     def validate_email(self, value):
-        # normalize and lowercase (your manager already normalizes but good to ensure at serializer-level)
-        return value.lower()
+        # stored lowercased: EmailAuthBackend looks users up by the normalized email
+        return normalize_email(value)
+
+    def validate(self, attrs):
+        # both uniqueness checks in one query instead of a validator query each
+        taken = taken_fields(attrs['email'], attrs['trainer'].get('contact_number'), 'staff_profile')
+        if taken:
+            raise serializers.ValidationError(self.taken_errors(taken))
+        return attrs
+
+    def taken_errors(self, taken):
+        errors = {}
+        if 'email' in taken:
+            errors['email'] = [unique_message(UserAccount, 'email')]
+        if 'contact_number' in taken:
+            errors['trainer'] = {'contact_number': [unique_message(Trainer, 'contact_number')]}
+        return errors
 
     def create(self, validated_data):
+        """
+        Create the user, trainer and profile with one INSERT each, in one
+        transaction. The profile is attached to the trainer before it is saved,
+        so create_trainer_profile stores it instead of a blank one.
+
+        validate() checked uniqueness, but a concurrent registration can still
+        win the race: a taken email or contact number is reported like
+        validate() would, and a trainer of the same name taking the slug
+        Trainer.unique_slug picked makes the whole transaction run again.
+        """
         trainer_data = validated_data.pop('trainer')
-        profile_data = trainer_data.pop('profile', None)
-        password = validated_data.pop('password')
+        profile_data = dict(trainer_data.pop('profile', None) or {})
+        # avatar might be a file from request.FILES; it is stored after commit by a worker
+        avatar = profile_data.pop('avatar', None)
+        # hashed once, however many attempts it takes
+        password = make_password(validated_data.pop('password'))
 
         # Ensure role is trainer; ignore whatever client may have passed
         validated_data['role'] = 'trainer'
 
-        with transaction.atomic():
-            # create user and set password
-            user = UserAccount(**validated_data)
-            user.set_password(password)
+        for attempt in range(1, self.slug_attempts + 1):
             try:
-                user.save()
-            except IntegrityError as e:
-                raise serializers.ValidationError({"email": "A user with this email already exists."})
-
-            # create trainer. contact_number unique constraint may raise IntegrityError
-            try:
-                trainer = Trainer.objects.create(user=user, **trainer_data)
+                with transaction.atomic():
+                    user = UserAccount(password=password, **validated_data)
+                    user.save()
+                    trainer = Trainer(user=user, **trainer_data)
+                    trainer.profile = TrainerProfile(**profile_data)
+                    trainer.save()
+                    if avatar:
+                        queue_avatar(trainer.profile, avatar)
             except IntegrityError as e:
-                # rollback will happen automatically because of the transaction.atomic()
-                # map to a nicer message if it's the contact number:
-                if 'contact_number' in str(e).lower() or 'unique' in str(e).lower():
-                    raise serializers.ValidationError({"trainer": {"contact_number": "This contact number is already taken."}})
-                raise serializers.ValidationError({"trainer": "Unable to create trainer. Detail: %s" % str(e)})
-
-            # create profile if provided
-            if profile_data:
-                # avatar might be a file from request.FILES; DRF passes that in validated_data already
-                TrainerProfile.objects.create(trainer=trainer, **profile_data)
-
-        # return the user (trainer_details field will be used to get the nested trainer data)
-        return user
+                field = violated_field(e, UserAccount, ['email']) or violated_field(e, Trainer, ['contact_number', 'slug'])
+                if field == 'slug' and attempt < self.slug_attempts:
+                    continue
+                if field == 'slug':
+                    raise serializers.ValidationError(
+                        {"trainer": ["Another trainer with the same name registered at the same time; please try again."]}
+                    )
+                if field is None:
+                    raise serializers.ValidationError({"trainer": [f"Unable to create trainer. Detail: {e}"]})
+                raise serializers.ValidationError(self.taken_errors({field}))
+            # the trainer_details field builds the nested trainer data from the user
+            return user
 
     def to_representation(self, instance):
         """Return the created Trainer data (not just user)."""
@@ -187,3 +317,81 @@ class TrainerRegistrationSerializer(serializers.ModelSerializer):
         return rep
 
 
+# ---------- booking listings ----------
+class SparseFieldsMixin:
+    """
+    Lets a listing send a subset of its fields: pass fields={...} (from
+    account.fieldsets.requested_fields) and the rest are dropped.
+    Meta.columns maps each field to the model columns it reads, so
+    columns_for() can narrow the query to match.
+    """
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def columns_for(cls, fields, always=()):
+        names = cls.Meta.fields if fields is None else [name for name in cls.Meta.fields if name in fields]
+        columns = dict.fromkeys(always)
+        for name in names:
+            columns.update(dict.fromkeys(cls.Meta.columns[name]))
+        return list(columns)
+
+
+class BookingSerializer(SparseFieldsMixin, serializers.ModelSerializer):
+    """
+    Read-only projection shared by the booking listing endpoints.
+    Expects a queryset built with Booking.objects.with_participants(), or
+    one narrowed to columns_for() the requested fields.
+    """
+    trainer = serializers.SerializerMethodField()
+    customer = serializers.SerializerMethodField()
+    date = serializers.SerializerMethodField()
+    start_time = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Booking
+        fields = ['id', 'title', 'trainer', 'customer', 'date', 'start_time', 'session_started']
+        read_only_fields = fields
+        columns = {
+            'id': ['id'],
+            'title': ['title'],
+            'trainer': ['trainer__user__firstname', 'trainer__user__lastname'],
+            'customer': ['customer__user__firstname', 'customer__user__lastname'],
+            'date': ['start_time'],
+            'start_time': ['start_time'],
+            'session_started': ['session_started'],
+        }
+
+    def get_trainer(self, obj):
+        return obj.trainer.user.fullname()
+
+    def get_customer(self, obj):
+        return obj.customer.user.fullname()
+
+    def get_date(self, obj):
+        return obj.start_time.strftime("%d %B, %Y")
+
+    def get_start_time(self, obj):
+        return obj.start_time.strftime("%I:%M %p")
+
+
+class UpcomingBookingSerializer(BookingSerializer):
+    can_join = serializers.SerializerMethodField()
+    meeting_url = serializers.SerializerMethodField()
+
+    class Meta(BookingSerializer.Meta):
+        fields = BookingSerializer.Meta.fields + ['can_join', 'meeting_url']
+        read_only_fields = fields
+        columns = {**BookingSerializer.Meta.columns, 'can_join': ['start_time'], 'meeting_url': ['meeting_id']}
+
+    def get_can_join(self, obj):
+        # check if current time is within 30 minutes of the meeting
+        return obj.start_time - timedelta(minutes=30) >= now()  # Remember to change the sign
+
+    def get_meeting_url(self, obj):
+        # link to Jitsi meeting, generated from the booking's meeting id
+        return obj.meeting_url
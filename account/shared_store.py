@@ -0,0 +1,188 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.functional import LazyObject, empty
+
+# no rate window is longer than a day, so older hits can always go
+MAX_WINDOW = 24 * 60 * 60
+SWEEP_EVERY = 1000
+
+SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS throttle_hits (key TEXT NOT NULL, at REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS throttle_hits_key_at ON throttle_hits (key, at)',
+    # status is NULL while the first request is still running
+    'CREATE TABLE IF NOT EXISTS idempotency ('
+    ' key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, status INTEGER, body TEXT, expires REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS idempotency_expires ON idempotency (expires)',
+    # a log of revoked tokens (token) and of users whose tokens all go (user_id)
+    # counters bumped to retire what every worker cached under the old value
+    'CREATE TABLE IF NOT EXISTS versions (name TEXT PRIMARY KEY, value INTEGER NOT NULL)',
+    'CREATE TABLE IF NOT EXISTS revocations ('
+    ' id INTEGER PRIMARY KEY AUTOINCREMENT, token TEXT, user_id INTEGER, at REAL NOT NULL)',
+)
+
+
+class SharedStore:
+    """
+    Short-lived state shared by every worker process on one host, kept in a
+    SQLite file (settings.SHARED_STORE_PATH) next to the app rather than in
+    the main database. It holds the rate-limit hits of account.throttling,
+    the stored responses of account.idempotency, the token revocations
+    account.authentication's caches follow and the versions that key
+    per-process caches such as account.directory's.
+
+    Each thread has its own connection; updates run in BEGIN IMMEDIATE
+    transactions, so concurrent workers never interleave a read and its
+    write. The data is short-lived (losing it resets rate limits and
+    forgets responses a retry could have replayed), so the file runs in WAL
+    mode without fsync on every commit. A "file:" path
+    is opened as a URI, e.g. a shared in-memory database for tests.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._hits = 0
+
+    @property
+    def db(self):
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.path, timeout=5, isolation_level=None, uri=self.path.startswith('file:'))
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=OFF')
+            for statement in SCHEMA:
+                db.execute(statement)
+            self._local.db = db
+        return db
+
+    @contextmanager
+    def transaction(self):
+        db = self.db
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            yield db
+        except BaseException:
+            db.execute('ROLLBACK')
+            raise
+        db.execute('COMMIT')
+
+    def hit(self, key, limit, window):
+        """
+        Record a hit on key unless it already had limit hits in the last
+        window seconds (a sliding log). Returns (allowed, retry_after), where
+        retry_after is the seconds until the oldest counted hit expires.
+        """
+        now = time.time()
+        with self.transaction() as db:
+            db.execute('DELETE FROM throttle_hits WHERE key = ? AND at <= ?', (key, now - window))
+            count, oldest = db.execute(
+                'SELECT COUNT(*), MIN(at) FROM throttle_hits WHERE key = ?', (key,)
+            ).fetchone()
+            if count >= limit:
+                return False, oldest + window - now
+            db.execute('INSERT INTO throttle_hits (key, at) VALUES (?, ?)', (key, now))
+        self._hits += 1
+        if self._hits % SWEEP_EVERY == 0:
+            self.sweep(now)
+        return True, None
+
+    def claim(self, key, fingerprint, lease, max_entries):
+        """
+        Claim key for a request with this fingerprint, or return what it was
+        claimed with before: None if the caller now owns the key, else the
+        existing (fingerprint, status, body), status being None while the
+        owner is still running. The claim lapses after lease seconds unless
+        complete() stores a response. Past max_entries the oldest keys go.
+        """
+        now = time.time()
+        with self.transaction() as db:
+            db.execute('DELETE FROM idempotency WHERE expires <= ?', (now,))
+            row = db.execute(
+                'SELECT fingerprint, status, body FROM idempotency WHERE key = ?', (key,)
+            ).fetchone()
+            if row is not None:
+                return row
+            cursor = db.execute(
+                'INSERT INTO idempotency (key, fingerprint, expires) VALUES (?, ?, ?)', (key, fingerprint, now + lease)
+            )
+            # rowids grow with every insert, so this keeps the newest max_entries keys
+            db.execute('DELETE FROM idempotency WHERE rowid <= ?', (cursor.lastrowid - max_entries,))
+        return None
+
+    def stored(self, key):
+        """Whether key holds a completed response that has not expired."""
+        row = self.db.execute(
+            'SELECT 1 FROM idempotency WHERE key = ? AND status IS NOT NULL AND expires > ?', (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def complete(self, key, status, body, ttl):
+        """Store the response for a claimed key, to be replayed for ttl seconds."""
+        with self.transaction() as db:
+            db.execute(
+                'UPDATE idempotency SET status = ?, body = ?, expires = ? WHERE key = ?',
+                (status, body, time.time() + ttl, key),
+            )
+
+    def release(self, key):
+        """Give up a claim, so the next request with the key runs again."""
+        with self.transaction() as db:
+            db.execute('DELETE FROM idempotency WHERE key = ?', (key,))
+
+    def version(self, name):
+        row = self.db.execute('SELECT value FROM versions WHERE name = ?', (name,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def bump(self, name):
+        """Move name to a new version, so entries cached under the old one are no longer read."""
+        with self.transaction() as db:
+            db.execute(
+                'INSERT INTO versions (name, value) VALUES (?, 1) '
+                'ON CONFLICT (name) DO UPDATE SET value = value + 1', (name,)
+            )
+
+    def revoke(self, token=None, user_id=None, keep=MAX_WINDOW):
+        """Log that a token, or every token of a user, was revoked; entries older than keep seconds go."""
+        now = time.time()
+        with self.transaction() as db:
+            db.execute('INSERT INTO revocations (token, user_id, at) VALUES (?, ?, ?)', (token, user_id, now))
+            db.execute('DELETE FROM revocations WHERE at <= ?', (now - keep,))
+
+    def revocations(self, after):
+        """The (id, token, user_id) revocations logged after id, oldest first."""
+        return self.db.execute(
+            'SELECT id, token, user_id FROM revocations WHERE id > ? ORDER BY id', (after,)
+        ).fetchall()
+
+    def sweep(self, now=None):
+        """Drop hits no window can still count, left behind by keys that went quiet."""
+        now = time.time() if now is None else now
+        with self.transaction() as db:
+            db.execute('DELETE FROM throttle_hits WHERE at <= ?', (now - MAX_WINDOW,))
+
+    def clear(self):
+        with self.transaction() as db:
+            db.execute('DELETE FROM throttle_hits')
+            db.execute('DELETE FROM idempotency')
+            db.execute('DELETE FROM revocations')
+            db.execute('DELETE FROM versions')
+
+
+class LazySharedStore(LazyObject):
+    def _setup(self):
+        self._wrapped = SharedStore(str(settings.SHARED_STORE_PATH))
+
+
+shared_store = LazySharedStore()
+
+
+@receiver(setting_changed)
+def reset_shared_store(setting, **kwargs):
+    if setting == 'SHARED_STORE_PATH':
+        shared_store._wrapped = empty
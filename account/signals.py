@@ -1,13 +1,94 @@
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
-from .models import Trainer, TrainerProfile
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from .models import UserAccount, Customer, Trainer, TrainerProfile, Booking, WorkingHours, normalize_name
+from .directory import invalidate_trainer_directory
+from .authentication import token_cache
+from .avatars import release_avatar
+
+# fields the trainer directory is built from, per model
+DIRECTORY_FIELDS = {
+    UserAccount: {'firstname', 'lastname'},
+    Trainer: {'specialization', 'contact_number', 'available', 'slug'},
+    TrainerProfile: {'instagram', 'twitter'},
+}
+
 
 @receiver(post_save, sender=Trainer)
-def create_trainer_profile(sender, instance, created, **kwargs):
-    if created:
+def create_trainer_profile(sender, instance, created, raw=False, **kwargs):
+    # every trainer gets exactly one profile: the one attached in memory
+    # (trainer.profile = TrainerProfile(...)) if any, otherwise a blank one
+    if not created or raw:
+        return
+    profile = Trainer.profile.related.get_cached_value(instance, None)
+    if profile is None:
         TrainerProfile.objects.create(trainer=instance)
+    else:
+        profile.trainer = instance
+        profile.save()
+
+
+@receiver(post_save, sender=UserAccount)
+def sync_trainer_search_name(sender, instance, created, update_fields=None, **kwargs):
+    # keep the indexed name used by create_booking's fallback lookup current
+    if created or instance.role != 'trainer':
+        return
+    if update_fields and not {'firstname', 'lastname'} & set(update_fields):
+        return
+    Trainer.objects.filter(user=instance).update(search_name=normalize_name(instance.fullname()))
+
+
+def touches_directory(sender, update_fields):
+    return not update_fields or bool(DIRECTORY_FIELDS[sender] & set(update_fields))
+
+
+@receiver([post_save, post_delete], sender=Trainer)
+@receiver([post_save, post_delete], sender=TrainerProfile)
+def invalidate_directory_for_trainer(sender, instance, update_fields=None, **kwargs):
+    if touches_directory(sender, update_fields):
+        invalidate_trainer_directory()
+
+
+@receiver([post_save, post_delete], sender=UserAccount)
+def invalidate_directory_for_user(sender, instance, update_fields=None, **kwargs):
+    # customers and admins never appear in the directory
+    if instance.role == 'trainer' and touches_directory(sender, update_fields):
+        invalidate_trainer_directory()
+
+
+@receiver([post_save, post_delete], sender=WorkingHours)
+def invalidate_directory_for_hours(sender, instance, **kwargs):
+    invalidate_trainer_directory()
+
+
+@receiver([post_save, post_delete], sender=Booking)
+def invalidate_directory_for_booking(sender, instance, **kwargs):
+    # the directory only lists today's open slots
+    if timezone.localdate(instance.start_time) == timezone.localdate():
+        invalidate_trainer_directory()
+
+
+@receiver(post_delete, sender=Token)
+def evict_cached_token(sender, instance, **kwargs):
+    token_cache.evict(instance.key)
+
 
+@receiver([post_save, post_delete], sender=UserAccount)
+def evict_cached_tokens_for_user(sender, instance, **kwargs):
+    # password, name or active-flag changes must not be served from the auth cache
+    token_cache.evict_user(instance.pk)
 
 
+@receiver([post_save, post_delete], sender=Customer)
+@receiver([post_save, post_delete], sender=Trainer)
+def evict_cached_tokens_for_profile(sender, instance, **kwargs):
+    # cached users carry their role profile, joined in by the auth query
+    token_cache.evict_user(instance.user_id)
 
 
+@receiver(post_delete, sender=UserAccount)
+@receiver(post_delete, sender=TrainerProfile)
+def release_deleted_avatar(sender, instance, **kwargs):
+    # deduplicated files may be shared, so only drop this row's references
+    release_avatar(instance)
@@ -0,0 +1,125 @@
+import hashlib
+import posixpath
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import Storage
+from django.core.signals import setting_changed
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.dispatch import receiver
+from django.utils.functional import LazyObject, empty
+from django.utils.module_loading import import_string
+
+
+class ContentAddressedStorage(Storage):
+    """
+    Stores files under the SHA-256 of their bytes in another storage backend.
+
+    Saving content that is already stored skips the upload and returns the
+    existing name. Every save adds a reference in account.StoredFile and every
+    delete() drops one; objects are only removed from the backend by the
+    gc_media command once nothing refers to them. Names that were not saved
+    through this class are left alone by delete().
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @staticmethod
+    def digest(content):
+        sha = hashlib.sha256()
+        size = 0
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        for chunk in content.chunks():
+            sha.update(chunk)
+            size += len(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        return sha.hexdigest(), size
+
+    def get_available_name(self, name, max_length=None):
+        # the final name comes from the content in _save, so don't ask the backend
+        return name
+
+    def _save(self, name, content):
+        StoredFile = apps.get_model('account', 'StoredFile')
+        sha256, size = self.digest(content)
+        if StoredFile.objects.filter(sha256=sha256).update(refcount=F('refcount') + 1):
+            return StoredFile.objects.values_list('name', flat=True).get(sha256=sha256)
+
+        extension = posixpath.splitext(name)[1].lower()
+        stored = self.backend.save(posixpath.join(posixpath.dirname(name), sha256 + extension), content)
+        try:
+            with transaction.atomic():
+                StoredFile.objects.create(
+                    name=stored, sha256=sha256, size=size, url=self.backend.url(stored), refcount=1
+                )
+        except IntegrityError:
+            # the same bytes were stored concurrently; keep theirs, drop our copy
+            StoredFile.objects.filter(sha256=sha256).update(refcount=F('refcount') + 1)
+            existing = StoredFile.objects.values_list('name', flat=True).get(sha256=sha256)
+            if existing != stored:
+                self.backend.delete(stored)
+            return existing
+        return stored
+
+    def _open(self, name, mode='rb'):
+        return self.backend.open(name, mode)
+
+    def delete(self, name):
+        StoredFile = apps.get_model('account', 'StoredFile')
+        StoredFile.objects.filter(name=name, refcount__gt=0).update(refcount=F('refcount') - 1)
+
+    def release_urls(self, urls):
+        """Drop one reference per entry in urls from the stored file served there."""
+        StoredFile = apps.get_model('account', 'StoredFile')
+        urls = list(urls)
+        names = dict(StoredFile.objects.filter(url__in=set(urls)).values_list('url', 'name'))
+        for url in urls:
+            if url in names:
+                self.delete(names[url])
+
+    def exists(self, name):
+        return self.backend.exists(name)
+
+    def size(self, name):
+        return self.backend.size(name)
+
+    def url(self, name):
+        return self.backend.url(name)
+
+    def path(self, name):
+        return self.backend.path(name)
+
+    def listdir(self, path):
+        return self.backend.listdir(path)
+
+    def get_modified_time(self, name):
+        return self.backend.get_modified_time(name)
+
+
+class AvatarStorage(LazyObject):
+    """
+    The storage backend named by settings.AVATAR_STORAGE, built on first use
+    and wrapped in ContentAddressedStorage unless AVATAR_DEDUPLICATE is off.
+    """
+
+    def _setup(self):
+        backend = import_string(settings.AVATAR_STORAGE)()
+        self._wrapped = ContentAddressedStorage(backend) if settings.AVATAR_DEDUPLICATE else backend
+
+
+avatar_storage = AvatarStorage()
+
+
+def get_avatar_storage():
+    # referenced by the avatar fields so migrations don't pin a backend
+    return avatar_storage
+
+
+@receiver(setting_changed)
+def reset_avatar_storage(setting, **kwargs):
+    if setting in ('AVATAR_STORAGE', 'AVATAR_DEDUPLICATE'):
+        avatar_storage._wrapped = empty
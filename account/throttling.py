@@ -0,0 +1,89 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.throttling import SimpleRateThrottle
+
+from .idempotency import has_stored_reply
+from .models import normalize_email
+from .shared_store import shared_store
+
+
+class SlidingWindowThrottle(SimpleRateThrottle):
+    """
+    A DRF throttle whose sliding log lives in the shared store, so every
+    worker on the host counts against the same limit.
+
+    Rates come from settings.THROTTLE_RATES[scope] ("count/period", period
+    s/m/h/d) and are read per request, so they can be changed in tests; a
+    rate of None switches the rule off. Subclasses return the key to count
+    against from get_cache_key(), or None to skip the request. With
+    skip_replays set, a retry whose Idempotency-Key already has a stored
+    response isn't counted, since the view replays it without doing the work.
+    """
+    skip_replays = False
+
+    def get_rate(self):
+        try:
+            return settings.THROTTLE_RATES[self.scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No rate set for the '{self.scope}' throttle scope in THROTTLE_RATES")
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+        if self.skip_replays and has_stored_reply(request):
+            return True
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+        allowed, self.retry_after = shared_store.hit(key, self.num_requests, self.duration)
+        return allowed
+
+    def wait(self):
+        return self.retry_after
+
+    def key(self, kind, value):
+        return f'throttle:{self.scope}:{kind}:{value}'
+
+
+class IPRateThrottle(SlidingWindowThrottle):
+    """Counts per client address (honouring NUM_PROXIES, as DRF's own throttles do)."""
+
+    def get_cache_key(self, request, view):
+        return self.key('ip', self.get_ident(request))
+
+
+class UserRateThrottle(SlidingWindowThrottle):
+    """Counts per signed-in user, falling back to the client address."""
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return self.key('user', request.user.pk)
+        return self.key('ip', self.get_ident(request))
+
+
+class EmailRateThrottle(SlidingWindowThrottle):
+    """Counts per submitted email, however it is spelled, so one account can't be attacked from many addresses."""
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email')
+        if not isinstance(email, str) or not email.strip():
+            return None
+        return self.key('email', normalize_email(email))
+
+
+class SignInRateThrottle(IPRateThrottle):
+    scope = 'signin'
+
+
+class SignInEmailRateThrottle(EmailRateThrottle):
+    scope = 'signin-email'
+
+
+class RegistrationRateThrottle(IPRateThrottle):
+    scope = 'register'
+    skip_replays = True
+
+
+class BookingRateThrottle(UserRateThrottle):
+    scope = 'booking'
+    skip_replays = True
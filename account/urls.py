@@ -9,16 +9,22 @@ urlpatterns = [
     path('customers/update/', CustomerUpdateView.as_view(), name='customer-update'),
     path('customers/password-update/', CustomerPasswordUpdateView.as_view(), name='customer-password-update'),
     path('me/', UserDetailView.as_view(), name='user-detail'),
+    path('dashboard/', dashboard, name='dashboard'),
     path('customer/fetch/', CustomerDetailView.as_view(), name="customer-detail"),
     path('signin/', SignInView.as_view(), name='signin'), 
     path('signout/', SignOutView.as_view(), name='signout'),
     path('trainers/', trainer_list, name="trainer-list"),
+    path('trainers/availability/', trainer_availability, name="trainer-availability"),
     path('bookings/create/', create_booking, name="create-booking" ),
     path('bookings/upcoming/', upcoming_sessions, name="upcoming-sessions" ),
     path('bookings/past/', past_sessions, name="past-sessions" ),
     path('bookings/trainer/upcoming/', upcoming_trainer_sessions, name="upcoming-trainer-sessions"),
     path('bookings/trainer/past/', past_trainer_sessions, name="past-trainer-sessions"),
     path('bookings/<int:booking_id>/start/', start_session, name='start-session'),
+    path('bookings/<int:booking_id>/meeting/', get_meeting, name='booking-meeting'),
+    path('metrics', metrics, name='metrics'),
+    path('calendar/', CalendarTokenView.as_view(), name='calendar-token'),
+    path('calendar/<str:key>.ics', calendar_feed, name='calendar-feed'),
 ]
 
 if settings.DEBUG:  # only serve locally in dev
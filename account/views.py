@@ -1,19 +1,44 @@
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, generics
-from .serializers import TrainerRegistrationSerializer, CustomerCreateSerializer, UserAccountSerializer
-from .models import Customer, Booking, Trainer, TrainerProfile
-from rest_framework.exceptions import ValidationError
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from .serializers import (
+    TrainerRegistrationSerializer, CustomerCreateSerializer, UserAccountSerializer,
+    BookingSerializer, UpcomingBookingSerializer,
+)
+from .models import Customer, Booking, Trainer, CalendarToken, normalize_name
+from .pagination import BookingCursorPagination
+from .permissions import IsCustomer, IsTrainer, IsCustomerOrTrainer
+from .dashboard import SECTIONS, build_dashboard, parse_limit
+from .directory import DIRECTORY_FIELDS, get_trainer_directory
+from .fieldsets import requested_fields, select_columns
+from .availability import open_slots, session_duration
+from .avatars import queue_avatar
+from .async_api import async_api_view, json_response
+from .metrics import registry
+from .idempotency import idempotent
+from .throttling import BookingRateThrottle, RegistrationRateThrottle, SignInEmailRateThrottle, SignInRateThrottle
+from .ical import feed_bookings, feed_version, render_feed
+from django.conf import settings
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.authtoken.models import Token
 from rest_framework.authtoken.views import ObtainAuthToken
 from django.contrib.auth import authenticate
-from rest_framework.decorators import api_view, permission_classes
-from django.utils.timezone import now
-from datetime import timedelta
+from django.db import transaction, IntegrityError
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
+from django.utils.timezone import now, localdate, make_aware
+from django.utils.dateparse import parse_date
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import require_GET, require_safe
 import datetime
 
 class TrainerRegistrationView(APIView):
+    throttle_classes = [RegistrationRateThrottle]
+
+    @method_decorator(idempotent)
     def post(self, request):
         serializer = TrainerRegistrationSerializer(data=request.data)
         if serializer.is_valid():
@@ -23,9 +48,11 @@ class TrainerRegistrationView(APIView):
 
 class CustomerRegisterView(generics.CreateAPIView):
     permission_classes = [AllowAny]
+    throttle_classes = [RegistrationRateThrottle]
     queryset = Customer.objects.all()
     serializer_class = CustomerCreateSerializer
 
+    @method_decorator(idempotent)
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
@@ -38,6 +65,8 @@ class CustomerRegisterView(generics.CreateAPIView):
         
 class SignInView(ObtainAuthToken):
     permission_classes = [AllowAny]
+    # checked before the password is hashed
+    throttle_classes = [SignInRateThrottle, SignInEmailRateThrottle]
 
     def post(self, request, *args, **kwargs):
         email = request.data.get('email')
@@ -63,36 +92,35 @@ class SignInView(ObtainAuthToken):
         })
 
 class CustomerUpdateView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsCustomer]
 
     def post(self, request, *args, **kwargs):
         firstname = request.data.get('firstname')
         lastname = request.data.get('lastname')
         avatar = request.FILES.get('avatar')
 
-        try:
-            customer = Customer.objects.get(user=request.user)
-            user = customer.user
-
-            if firstname:
-                user.firstname = firstname
-            if lastname:
-                user.lastname = lastname
-            if avatar:
-                user.avatar = avatar
+        user = request.user
 
-            user.save()
+        if firstname:
+            user.firstname = firstname
+        if lastname:
+            user.lastname = lastname
 
-            serializer = UserAccountSerializer(user, context={'request': request})
-           
-            return Response(serializer.data)
+        user.save()
+        if avatar:
+            # stored by a background worker; the current avatar is returned until then
+            queue_avatar(user, avatar)
 
-        except Customer.DoesNotExist:
-            return Response({"detail": "Customer profile not found"}, status=404)
+        serializer = UserAccountSerializer(user, context={'request': request})
+        data = serializer.data
+        if avatar:
+            data['avatar_processing'] = True
+       
+        return Response(data)
 
 
 class CustomerPasswordUpdateView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsCustomer]
 
     def post(self, request, *args, **kwargs):
         password = request.data.get('new_password')
@@ -101,17 +129,12 @@ class CustomerPasswordUpdateView(APIView):
         if password != confirm_password:
             return Response({"detail": "Passwords do not match"}, status=400)
 
-        try:
-            customer = Customer.objects.get(user=request.user)
-            user = customer.user
-            user.set_password(password)  # ✅ hashes the password
-            user.save()
-
-            serializer = UserAccountSerializer(user, context={'request': request})
-            return Response(serializer.data, status=200)
+        user = request.user
+        user.set_password(password)  # ✅ hashes the password
+        user.save()
 
-        except Customer.DoesNotExist:
-            return Response({"detail": "Customer profile not found"}, status=404)
+        serializer = UserAccountSerializer(user, context={'request': request})
+        return Response(serializer.data, status=200)
 
 
 class SignOutView(APIView):
@@ -119,7 +142,9 @@ class SignOutView(APIView):
 
     def post(self, request, *args, **kwargs):
         try:
-            request.user.auth_token.delete()  # Delete the token
+            # token auth already loaded the token; session users fall back to the relation
+            token = request.auth if isinstance(request.auth, Token) else request.user.auth_token
+            token.delete()  # Delete the token
         except (AttributeError, Token.DoesNotExist):
             pass  # Token might not exist
         
@@ -136,20 +161,15 @@ class UserDetailView(APIView):
         return Response(serializer.data)
 
 class CustomerDetailView(APIView):
-    permission_classes = [IsAuthenticated]
+    permission_classes = [IsCustomer]
 
     def get(self, request):
-        try:
-            customer = Customer.objects.get(user=request.user)
-           
-        except Customer.DoesNotExist:
-            return Response({"detail": "Customer profile not found"}, status=404)
-
+        user = request.user
         data = {
-            "firstname": customer.user.firstname,
-            "lastname": customer.user.lastname,
-            "email": customer.user.email,
-            "contact_number": customer.contact_number,
+            "firstname": user.firstname,
+            "lastname": user.lastname,
+            "email": user.email,
+            "contact_number": request.customer.contact_number,
         }
 
         return Response(data)
@@ -159,191 +179,228 @@ class CustomerDetailView(APIView):
 @api_view(["GET"])
 @permission_classes([AllowAny])  # or IsAuthenticated if needed
 def trainer_list(request):
-    trainers = TrainerProfile.objects.all()
-    
+    fields = requested_fields(request, DIRECTORY_FIELDS)
+    directory = get_trainer_directory()
+    etag = directory['etag']
+    if fields is not None:
+        # each selection is its own representation, so it gets its own validator
+        etag = '"%s-%s"' % (etag.strip('"'), '-'.join(sorted(fields)))
+    # repeat visitors revalidate against the cached entry without touching the DB
+    not_modified = get_conditional_response(
+        request, etag=etag, last_modified=directory['last_modified']
+    )
+    if not_modified is not None:
+        return not_modified
+
+    data = directory['data']
+    if fields is not None:
+        data = [{key: value for key, value in row.items() if key in fields} for row in data]
+    response = Response(data)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(directory['last_modified'])
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+
+@api_view(["GET"])
+@permission_classes([AllowAny])
+def trainer_availability(request):
+    """
+    Open slots per trainer between ?start= and ?end= (YYYY-MM-DD, inclusive).
+    Defaults to today; pass ?trainer=<id> to narrow to one trainer.
+    Slot dates and times use the format create_booking expects.
+    """
+    params = request.query_params
+    try:
+        start = parse_date(params["start"]) if params.get("start") else localdate()
+        end = parse_date(params["end"]) if params.get("end") else start
+    except ValueError:
+        start = end = None
+    if start is None or end is None:
+        return Response({"error": "Dates must be in YYYY-MM-DD format"}, status=status.HTTP_400_BAD_REQUEST)
+    # open_slots reaches a day past the window on either side
+    first, last = datetime.date.min + datetime.timedelta(days=1), datetime.date.max - datetime.timedelta(days=1)
+    if not (first <= start and end <= last):
+        return Response({"error": f"Dates must be between {first} and {last}"}, status=status.HTTP_400_BAD_REQUEST)
+    if end < start:
+        return Response({"error": "end must not be before start"}, status=status.HTTP_400_BAD_REQUEST)
+    if (end - start).days >= settings.AVAILABILITY_MAX_DAYS:
+        return Response(
+            {"error": f"Date range is limited to {settings.AVAILABILITY_MAX_DAYS} days"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    trainers = Trainer.objects.select_related("user").order_by("id")
+    trainer_id = params.get("trainer")
+    if trainer_id:
+        trainers = trainers.filter(id=trainer_id) if trainer_id.isdigit() else trainers.none()
+
+    trainers = list(trainers)
+    slots = open_slots(trainers, start, end, not_before=now())
     data = []
-    for ind in trainers:
+    for trainer in trainers:
         data.append({
-            "id": ind.id,
-            "name": f"{ind.trainer.user.firstname} {ind.trainer.user.lastname}",  # comes from User model
-            "specialization": ind.trainer.specialization,
-            "phonenumber": ind.trainer.contact_number,
-            "instagram": ind.instagram,
-            "twitter": ind.twitter,
-            "availableTimes": ["05:00 AM", "10:00 AM", "7:00 PM"],  # replace with real availability
+            "id": trainer.id,
+            "slug": trainer.slug,
+            "name": trainer.user.fullname(),
+            "slots": [
+                {"date": slot.strftime("%Y-%m-%d"), "time": slot.strftime("%I:%M %p")}
+                for slot in slots[trainer.id]
+            ],
         })
     return Response(data)
 
 
 #Bookings
 @api_view(["POST"])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsCustomer])
+@throttle_classes([BookingRateThrottle])
+@idempotent
 def create_booking(request):
     """
     Expected JSON:
     {
         "session_type": "virtual",
-        "instructor": "Ama Agyei",
+        "trainer_id": 3,
         "date": "2025-08-20",
         "time": "09:30 AM"
     }
+    The trainer can be given as "trainer_id", as its "trainer" slug, or by
+    full name as "instructor" (e.g. "Ama Agyei"). Clients that retry should
+    send an Idempotency-Key header, so a retry gets the first answer back.
     """
     data = request.data
-    print(data)
-   
+
     session_type = data.get("session_type")
+    trainer_id = data.get("trainer_id")
+    trainer_slug = data.get("trainer")
     instructor_name = data.get("instructor")
     date = data.get("date")
     time = data.get("time")
 
-    customer = Customer.objects.get(user=request.user)
-
-    if not (session_type and instructor_name and date and time):
+    if not (session_type and (trainer_id or trainer_slug or instructor_name) and date and time):
         return Response({"error": "Missing required fields"}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Example: you can store trainer as a User with role=trainer
+    # Combine date + time into a datetime object
     try:
-        trainer = Trainer.objects.get(user__firstname=instructor_name.split()[0], user__lastname=instructor_name.split()[-1])
-    except Trainer.DoesNotExist:
-        return Response({"error": "Trainer not found"}, status=status.HTTP_404_NOT_FOUND)
+        start_time = make_aware(datetime.datetime.strptime(f"{date} {time}", "%Y-%m-%d %I:%M %p"))
+    except (ValueError, KeyError):
+        return Response({"error": "date must be YYYY-MM-DD and time hh:mm AM/PM"}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Combine date + time into a datetime object
-    
-    start_time = datetime.datetime.strptime(f"{date} {time}", "%Y-%m-%d %I:%M %p")
+    # each lookup is a single probe of a unique or indexed column
+    try:
+        if trainer_id:
+            trainer = Trainer.objects.get(pk=int(trainer_id))
+        elif trainer_slug:
+            trainer = Trainer.objects.get(slug=trainer_slug)
+        else:
+            trainer = Trainer.objects.get(search_name=normalize_name(instructor_name))
+    except (Trainer.DoesNotExist, ValueError, TypeError):
+        return Response({"error": "Trainer not found"}, status=status.HTTP_404_NOT_FOUND)
+    except Trainer.MultipleObjectsReturned:
+        return Response(
+            {"error": "More than one trainer has that name; book by trainer_id or trainer slug"},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
 
-    # Assume fixed duration (e.g., 1 hr) or adjust later
-    # end_time = start_time + datetime.timedelta(minutes=60)
+    duration = session_duration()
+    slot_taken = Response({"error": "This trainer is already booked at that time"}, status=status.HTTP_409_CONFLICT)
 
-    booking = Booking.objects.create(
-        customer=customer,
-        trainer=trainer,
-        session_type=session_type,
-        title=f"{session_type.capitalize()} Session",
-        start_time=start_time,
-    )
+    try:
+        with transaction.atomic():
+            # lock only this trainer's row so overlapping requests for the same
+            # trainer queue up while other trainers' bookings proceed
+            Trainer.objects.select_for_update().filter(pk=trainer.pk).values_list("pk").get()
+            overlapping = Booking.objects.filter(
+                trainer=trainer, start_time__gt=start_time - duration, start_time__lt=start_time + duration
+            )
+            if overlapping.exists():
+                return slot_taken
+
+            booking = Booking.objects.create(
+                customer=request.customer,
+                trainer=trainer,
+                session_type=session_type,
+                title=f"{session_type.capitalize()} Session",
+                start_time=start_time,
+            )
+    except IntegrityError:
+        # the (trainer, start_time) unique constraint caught a concurrent insert
+        return slot_taken
 
     return Response({
         "message": "Booking created successfully",
         "booking_id": booking.id
     }, status=status.HTTP_201_CREATED)
 
-@api_view(["GET"])
-def get_meeting(request, booking_id):
+@require_GET
+@async_api_view(IsAuthenticated)
+async def get_meeting(request, booking_id):
     try:
-        booking = Booking.objects.get(id=booking_id)
-        return Response({
-            "meeting_id": booking.meeting_id,
-            "customer": booking.customer.user.firstname,
-            "trainer": booking.trainer.user.firstname,
-        })
+        booking = await Booking.objects.with_participants().aget(id=booking_id)
     except Booking.DoesNotExist:
-        return Response({"error": "Booking not found"}, status=404)
-    
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def upcoming_sessions(request):
-    user = request.user
-    customer = Customer.objects.get(user=user)
+        return json_response({"error": "Booking not found"}, status=404)
+    # only the two participants may see the meeting id
+    if request.user.id not in (booking.customer.user_id, booking.trainer.user_id):
+        return json_response({"error": "Booking not found"}, status=404)
+    return json_response({
+        "meeting_id": booking.meeting_id,
+        "customer": booking.customer.user.firstname,
+        "trainer": booking.trainer.user.firstname,
+    })
+
+def booking_rows(request, serializer_class, **filters):
+    """
+    A listing's bookings, loading only the columns the ?fields= selection
+    needs, plus that selection for the serializer (None means every field).
+    """
+    fields = requested_fields(request, serializer_class.Meta.fields)
+    # the pagination cursor is built from start_time and id, so they are always loaded
+    columns = serializer_class.columns_for(fields, always=('id', 'start_time'))
+    return select_columns(Booking.objects.filter(**filters), columns), fields
+
+@require_GET
+@async_api_view(IsCustomer)
+async def upcoming_sessions(request):
     # get all future bookings for this user
-    bookings = Booking.objects.filter(customer=customer, start_time__gte=now()).order_by("start_time")
-    # print(bookings)
-    data = []
-    for booking in bookings:
-        # check if current time is within 30 minutes of the meeting
-        can_join = booking.start_time - timedelta(minutes=30) >= now() #Remember to change the sign
-
-        data.append({
-            "id": booking.id,
-            "title": booking.title,
-            "trainer": booking.trainer.user.fullname(),
-            "customer": booking.customer.user.fullname(),
-            "date": booking.start_time.strftime("%d %B, %Y"),
-            "start_time": booking.start_time.strftime("%I:%M %p"),
-            "session_started": booking.session_started,
-            "can_join": can_join,
-            # link to Jitsi meeting, e.g. generate based on booking id
-            "meeting_url": f"https://meet.jit.si/winnyfit_{booking.meeting_id}"
-        })
-
-   
-    return Response(data)
+    bookings, fields = booking_rows(request, UpcomingBookingSerializer, customer=request.customer, start_time__gte=now())
+    paginator = BookingCursorPagination()
+    page = await paginator.apaginate_queryset(bookings, request)
+    serializer = UpcomingBookingSerializer(page, many=True, fields=fields)
+    return json_response(paginator.get_paginated_data(serializer.data))
 
 @api_view(["GET"])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsCustomer])
 def past_sessions(request):
-    user = request.user
-    customer = Customer.objects.get(user=user)
-    # get all future bookings for this user
-    bookings = Booking.objects.filter(customer=customer, start_time__lte=now()).order_by("start_time")
-    # print(bookings)
-    data = []
-    for booking in bookings:
-        data.append({
-            "id": booking.id,
-            "title": booking.title,
-            "trainer": booking.trainer.user.fullname(),
-            "customer": booking.customer.user.fullname(),
-            "date": booking.start_time.strftime("%d %B, %Y"),
-            "start_time": booking.start_time.strftime("%I:%M %p"),
-            "session_started": booking.session_started,
-        })
-
-   
-    return Response(data)
-
-@api_view(["GET"])
-@permission_classes([IsAuthenticated])
-def upcoming_trainer_sessions(request):
-    user = request.user
-    trainer = Trainer.objects.get(user=user)
-    # get all future bookings for this user
-    bookings = Booking.objects.filter(trainer=trainer, start_time__gte=now()).order_by("start_time")
-    # print(bookings)
-    data = []
-    for booking in bookings:
-        # check if current time is within 30 minutes of the meeting
-        can_join = booking.start_time - timedelta(minutes=30) >= now() #Remember to change the sign
-
-        data.append({
-            "id": booking.id,
-            "title": booking.title,
-            "trainer": booking.trainer.user.fullname(),
-            "customer": booking.customer.user.fullname(),
-            "date": booking.start_time.strftime("%d %B, %Y"),
-            "start_time": booking.start_time.strftime("%I:%M %p"),
-            "session_started": booking.session_started,
-            "can_join": can_join,
-            # link to Jitsi meeting, e.g. generate based on booking id
-            "meeting_url": f"https://meet.jit.si/winnyfit_{booking.meeting_id}"
-        })
-
-    print(data)
-    return Response(data)
+    # get all past bookings for this user
+    bookings, fields = booking_rows(request, BookingSerializer, customer=request.customer, start_time__lte=now())
+    paginator = BookingCursorPagination()
+    page = paginator.paginate_queryset(bookings, request)
+    serializer = BookingSerializer(page, many=True, fields=fields)
+    return paginator.get_paginated_response(serializer.data)
+
+@require_GET
+@async_api_view(IsTrainer)
+async def upcoming_trainer_sessions(request):
+    # get all future bookings for this trainer
+    bookings, fields = booking_rows(request, UpcomingBookingSerializer, trainer=request.trainer, start_time__gte=now())
+    paginator = BookingCursorPagination()
+    page = await paginator.apaginate_queryset(bookings, request)
+    data = UpcomingBookingSerializer(page, many=True, fields=fields).data
+    return json_response(paginator.get_paginated_data(data))
 
 @api_view(["GET"])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsTrainer])
 def past_trainer_sessions(request):
-    user = request.user
-    trainer = Trainer.objects.get(user=user)
-    # get all future bookings for this user
-    bookings = Booking.objects.filter(trainer=trainer, start_time__lte=now()).order_by("start_time")
-    # print(bookings)
-    data = []
-    for booking in bookings:
-        data.append({
-            "id": booking.id,
-            "title": booking.title,
-            "trainer": booking.trainer.user.fullname(),
-            "customer": booking.customer.user.fullname(),
-            "date": booking.start_time.strftime("%d %B, %Y"),
-            "start_time": booking.start_time.strftime("%I:%M %p"),
-        })
-
-    print(data)
-    return Response(data)
+    # get all past bookings for this trainer
+    bookings, fields = booking_rows(request, BookingSerializer, trainer=request.trainer, start_time__lte=now())
+    paginator = BookingCursorPagination()
+    page = paginator.paginate_queryset(bookings, request)
+    data = BookingSerializer(page, many=True, fields=fields).data
+    return paginator.get_paginated_response(data)
 
 @api_view(["POST"])
-@permission_classes([IsAuthenticated])
+@permission_classes([IsTrainer])
 def start_session(request, booking_id):
     """
     Mark a booking's session as started. Only trainers can do this.
@@ -352,12 +409,91 @@ def start_session(request, booking_id):
         booking = Booking.objects.get(id=booking_id)
         
         # Only trainer can start their session
-        trainer = Trainer.objects.get(user=request.user)
-        if booking.trainer != trainer:
+        if booking.trainer_id != request.trainer.id:
             return Response({"error": "Only trainer can start the session"}, status=403)
 
         booking.session_started = True
         booking.save()
         return Response({"success": True, "session_started": True})
     except Booking.DoesNotExist:
-        return Response({"error": "Booking not found"}, status=404)
\ No newline at end of file
+        return Response({"error": "Booking not found"}, status=404)
+
+@api_view(["GET"])
+@permission_classes([IsCustomerOrTrainer])
+def dashboard(request):
+    """
+    Everything the app shows after sign-in, in one request: the user summary,
+    the next sessions, the latest past sessions and booking counts.
+    ?sections=user,upcoming,past,counts picks a subset (default: all);
+    ?upcoming= and ?past= set how many sessions to include.
+    """
+    sections = [s for s in request.query_params.get("sections", ",".join(SECTIONS)).split(",") if s]
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        return Response(
+            {"error": f"Unknown section(s): {', '.join(sorted(unknown))}. Choose from {', '.join(SECTIONS)}."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        limits = {name: parse_limit(request.query_params.get(name)) for name in ("upcoming", "past")}
+    except ValueError:
+        return Response({"error": "upcoming and past must be non-negative integers"},
+                        status=status.HTTP_400_BAD_REQUEST)
+    return Response(build_dashboard(request, set(sections), limits))
+
+@api_view(["GET"])
+@permission_classes([IsAdminUser])
+def metrics(request):
+    """Per-route request metrics for this worker, in the Prometheus text format."""
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+class CalendarTokenView(APIView):
+    """
+    The caller's private calendar feed URL (GET, created on first use).
+    POST issues a new one, so subscriptions to the old URL stop working.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        # get_or_create retries the lookup when a concurrent first GET wins the insert
+        token, _ = CalendarToken.objects.get_or_create(user=request.user, defaults={'key': CalendarToken.generate_key})
+        return self.feed_response(request, token)
+
+    def post(self, request):
+        token, _ = CalendarToken.objects.update_or_create(
+            user=request.user, defaults={'key': CalendarToken.generate_key()}
+        )
+        return self.feed_response(request, token)
+
+    def feed_response(self, request, token):
+        return Response({"url": request.build_absolute_uri(reverse('calendar-feed', args=[token.key]))})
+
+
+@require_safe
+def calendar_feed(request, key):
+    """
+    An iCalendar feed of the token owner's sessions, for calendar apps to
+    subscribe to. Unauthenticated: the key in the URL is the credential.
+    Events are streamed from an iterator so large feeds don't sit in memory,
+    and polling clients get a 304 from a single aggregate query.
+    """
+    token = CalendarToken.objects.select_related(
+        'user', 'user__customer_profile', 'user__staff_profile'
+    ).filter(key=key, user__is_active=True).first()
+    if token is None:
+        raise Http404("Unknown calendar")
+
+    bookings = feed_bookings(token.user)
+    etag, last_modified = feed_version(token.user, bookings)
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    response = StreamingHttpResponse(render_feed(token.user, bookings), content_type='text/calendar; charset=utf-8')
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = 'private, no-cache'
+    response['Content-Disposition'] = 'inline; filename="winnyfit.ics"'
+    return response
@@ -10,9 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 import os
+import tempfile
 from pathlib import Path
 import dotenv
 import dj_database_url
+from corsheaders.defaults import default_headers
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -51,6 +53,10 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so its timings cover the rest of the stack; served at /api/metrics
+    'account.metrics.MetricsMiddleware',
+    # before anything else that reads the body, so it sees the final response
+    'account.compression.CompressionMiddleware',
     "corsheaders.middleware.CorsMiddleware",
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.middleware.security.SecurityMiddleware',
@@ -79,10 +85,13 @@ CORS_ALLOWED_ORIGINS = [
 
 
 CORS_ALLOW_CREDENTIALS = True
+# retried POSTs from the web app carry an Idempotency-Key (see account/idempotency.py)
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
+CORS_EXPOSE_HEADERS = ['Idempotent-Replayed']
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'account.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -91,10 +100,54 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Sliding-window limits for the throttles in account/throttling.py, as "count/period"
+# (period s, m, h or d); None switches a rule off. Hits are counted in SHARED_STORE_PATH,
+# a SQLite file every worker on the host shares.
+THROTTLE_RATES = {
+    'signin': '30/min',       # per client address
+    'signin-email': '5/min',  # per account, from any address
+    'register': '20/hour',    # per client address, customer and trainer sign-ups
+    'booking': '30/hour',     # per customer
+}
+SHARED_STORE_PATH = os.getenv('SHARED_STORE_PATH', os.path.join(tempfile.gettempdir(), 'winnyfit-shared-store.sqlite3'))
+# Idempotency-Key responses are replayed for IDEMPOTENCY_TTL seconds; the store keeps at most
+# IDEMPOTENCY_MAX_ENTRIES keys, and a key whose first request never finished frees up after
+# IDEMPOTENCY_LOCK_SECONDS
+IDEMPOTENCY_TTL = 24 * 60 * 60
+IDEMPOTENCY_MAX_ENTRIES = 100_000
+IDEMPOTENCY_LOCK_SECONDS = 60
+
+# Per-process cache. The trainer directory's key carries a version kept in the
+# shared store, so invalidating it from any worker or command reaches them all.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+TRAINER_DIRECTORY_CACHE_TIMEOUT = 300
+
+# Sessions are booked in fixed-length blocks. Trainers marked available
+# without their own working hours get the default daily schedule below.
+SESSION_DURATION_MINUTES = 60
+TRAINER_DEFAULT_WORKING_HOURS = [("05:00", "06:00"), ("10:00", "11:00"), ("19:00", "20:00")]
+AVAILABILITY_MAX_DAYS = 31
+
+# Token -> user lookups are cached per worker. Sign-out and user updates evict
+# the entry locally; the TTL bounds how long other workers may still accept it.
+AUTH_TOKEN_CACHE_SIZE = 10000
+AUTH_TOKEN_CACHE_TTL = 60
+
+# Keyset pagination for the booking listings (?page_size= is capped at the max)
+BOOKING_PAGE_SIZE = 20
+BOOKING_MAX_PAGE_SIZE = 100
+# Sessions per list on the dashboard endpoint (?upcoming= / ?past= override, up to the max above)
+DASHBOARD_SESSIONS = 5
+# Responses are gzipped for clients that accept it once the body reaches this size
+COMPRESS_MIN_BYTES = 1024
+
+# one backend: a second one would hash the password again on every failed sign-in
 AUTHENTICATION_BACKENDS = [
     'account.backends.EmailAuthBackend',
-    'django.contrib.auth.backends.ModelBackend',
-    
 ]
 ROOT_URLCONF = 'backend.urls'
 
@@ -127,9 +180,15 @@ DATABASES = {
 }
 
 DATABASES['default'] = dj_database_url.config(default=os.getenv('DATABASE_URL'))
-DATABASES['default']['OPTIONS'] = {
-    'sslmode': 'require',
-}
+if DATABASES['default'].get('ENGINE') == 'django.db.backends.sqlite3':
+    # local runs (DATABASE_URL=sqlite:///...): writers queue for the lock instead of failing,
+    # and the test database is a file so tests can open several connections at once
+    DATABASES['default']['OPTIONS'] = {'transaction_mode': 'IMMEDIATE', 'timeout': 20}
+    DATABASES['default']['TEST'] = {'NAME': BASE_DIR / 'test-db.sqlite3'}
+else:
+    DATABASES['default']['OPTIONS'] = {
+        'sslmode': 'require',
+    }
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -177,6 +236,18 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 MEDIA_URL = '/media/'
 DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
+# Django 5 no longer reads DEFAULT_FILE_STORAGE; avatars go through AVATAR_STORAGE
+# (local filesystem unless set, e.g. to the Cloudinary storage above).
+AVATAR_STORAGE = os.getenv('AVATAR_STORAGE', 'django.core.files.storage.FileSystemStorage')
+# Uploads are staged locally and processed off the request thread.
+AVATAR_STAGING_DIR = os.getenv('AVATAR_STAGING_DIR', os.path.join(tempfile.gettempdir(), 'winnyfit-avatar-staging'))
+AVATAR_MAX_SIZE = 1024
+AVATAR_VARIANT_SIZES = (48, 128, 512)
+AVATAR_WORKERS = 2
+# Store each distinct file once, named by its SHA-256 (account.storage.ContentAddressedStorage).
+# Unreferenced files are removed by `manage.py gc_media` once older than MEDIA_GC_GRACE_SECONDS.
+AVATAR_DEDUPLICATE = True
+MEDIA_GC_GRACE_SECONDS = 3600
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 